@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
-"""Add outfit images from nested folders to MongoDB with base64 encoding"""
+"""Add outfit images from nested folders to MongoDB.
+
+Image bytes go into the content-addressed blob store (app/utils/blob_store.py)
+and the outfit document only keeps the blob key in `image_blob`; the old
+base64 `image` field is removed.
+"""
 
 from pymongo import MongoClient
+import argparse
 import os
 from dotenv import load_dotenv
-import base64
 from pathlib import Path
+from app.utils.blob_store import put_file
+from app.utils.catalog_writer import CatalogWriter
+from app.utils.embeddings import encode_embedding
 
 load_dotenv()
 
+parser = argparse.ArgumentParser(description="Attach outfit images to catalog documents")
+parser.add_argument("--batch-size", type=int, default=500)
+parser.add_argument("--dry-run", action="store_true")
+args = parser.parse_args()
+
 MONGO_URL = os.getenv("MONGO_URL")
 
 if not MONGO_URL:
@@ -22,12 +35,10 @@ db = client["ai_fashion"]
 # Path to outfit images folder
 OUTFIT_IMAGES_PATH = "outfit_images"
 
-def encode_image_to_base64(image_path):
-    """Read image file and convert to base64"""
+def store_image_blob(image_path):
+    """Copy image file into the blob store and return its content key"""
     try:
-        with open(image_path, 'rb') as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
-            return image_data
+        return put_file(image_path)
     except Exception as e:
         print(f"      Error reading image: {str(e)}")
         return None
@@ -92,68 +103,57 @@ try:
     # OPTION 2: Update existing outfits with images (RECOMMENDED)
     print("Updating existing outfits with images...\n")
     
-    inserted_count = 0
-    updated_count = 0
+    failed_count = 0
     
-    for outfit_info in outfit_files:
-        outfit_name = outfit_info['filename']
-        filepath = outfit_info['filepath']
-        category = outfit_info['category']
-        
-        print(f"  {outfit_name}...", end="", flush=True)
-        
-        # Encode image to base64
-        image_data = encode_image_to_base64(filepath)
-        
-        if image_data:
-            # Try to UPDATE existing outfit first
-            result = outfits_collection.update_one(
+    # One upsert per file: existing outfits get the image fields, missing ones
+    # are created with defaults ($setOnInsert). Sent as unordered bulk batches.
+    with CatalogWriter(outfits_collection, batch_size=args.batch_size, dry_run=args.dry_run,
+                       total=len(outfit_files), label="outfits") as writer:
+        for outfit_info in outfit_files:
+            outfit_name = outfit_info['filename']
+            filepath = outfit_info['filepath']
+            category = outfit_info['category']
+            
+            # Store image bytes by content hash
+            image_blob = store_image_blob(filepath)
+            
+            if not image_blob:
+                print(f"  {outfit_name}... ❌ (failed)")
+                failed_count += 1
+                continue
+            
+            writer.upsert(
                 {"name": outfit_name},
                 {
                     "$set": {
-                        "image": image_data,
+                        "image_blob": image_blob,
                         "category": category,
                         "filename": outfit_info['filename']
+                    },
+                    "$unset": {"image": ""},
+                    "$setOnInsert": {
+                        "type": category.lower(),
+                        "color": "Multi",
+                        "sleeves": "Short Sleeves",
+                        "occasion": "Casual",
+                        "body_types": ["hourglass", "pear", "rectangle", "apple"],
+                        "skin_tones": ["fair", "medium", "tan", "deep"],
+                        **encode_embedding([0.0] * 512, "placeholder-512"),
                     }
                 }
             )
-            
-            if result.matched_count > 0:
-                updated_count += 1
-                print(" ✅ (updated)")
-            else:
-                # If not found, insert new
-                outfit = {
-                    "name": outfit_name,
-                    "type": category.lower(),
-                    "color": "Multi",
-                    "sleeves": "Short Sleeves",
-                    "occasion": "Casual",
-                    "image": image_data,
-                    "filename": outfit_info['filename'],
-                    "category": category,
-                    "body_types": ["hourglass", "pear", "rectangle", "apple"],
-                    "skin_tones": ["fair", "medium", "tan", "deep"],
-                    "features": [0.0] * 512
-                }
-                
-                outfits_collection.insert_one(outfit)
-                inserted_count += 1
-                print(" ✅ (inserted)")
-        else:
-            print(" ❌ (failed)")
     
     # Verify
     total = outfits_collection.count_documents({})
-    with_images = outfits_collection.count_documents({"image": {"$ne": None}})
+    with_images = outfits_collection.count_documents({"image_blob": {"$exists": True}})
     
     print(f"\n{'='*60}")
     print(f"✅ COMPLETE!")
     print(f"{'='*60}")
     print(f"Total outfits in database: {total}")
     print(f"Outfits with images: {with_images}")
-    print(f"Updated: {updated_count}")
-    print(f"Inserted: {inserted_count}")
+    print(f"Writes: {writer.summary()}")
+    print(f"Failed: {failed_count}")
     
     # Show breakdown by category
     print(f"\n📊 Breakdown by category:")
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.routes import user, recommend, wishlist
+from fastapi.responses import PlainTextResponse
+from app.routes import user, recommend, wishlist, images, catalog
+from app.services.repositories import STORAGE_BACKEND
+from app.services.upload_store import UploadSizeLimit
+from app.utils.metrics import METRICS_ENABLED, render_prometheus
+from app.utils.blob_store import BLOB_STORE_ROOT, BLOB_URL_PREFIX
+from app.utils.http_cache import CACHE_CATALOG_IMAGE, CACHE_IMMUTABLE, CachingStaticFiles
 
 app = FastAPI(
     title="AI Fashion Recommendation API",
@@ -9,6 +14,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Reject oversized photo uploads by Content-Length, before the body is spooled.
+# Added first so CORS (outermost) still decorates the 413.
+app.add_middleware(UploadSizeLimit, paths=("/user/upload",))
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -18,13 +27,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def ensure_database_indexes():
+    """Build the MongoDB indexes the repositories rely on (app/utils/indexes.py)"""
+    if STORAGE_BACKEND == "mongo":
+        from app.utils.async_db import async_db
+        from app.utils.indexes import ensure_indexes_async
+        await ensure_indexes_async(async_db)
+
 # Include routers
 app.include_router(user.router, prefix="/user", tags=["User"])
 app.include_router(recommend.router, prefix="/recommend", tags=["Recommendations"])
 app.include_router(wishlist.router, prefix="/wishlist", tags=["Wishlist"])
+app.include_router(images.router, prefix="/images", tags=["Images"])
+app.include_router(catalog.router, prefix="/catalog", tags=["Catalog"])
 
 # ✅ Serve outfit images folder
-app.mount("/outfit_images", StaticFiles(directory="outfit_images"), name="outfit_images")
+app.mount("/outfit_images", CachingStaticFiles(directory="outfit_images", cache_control=CACHE_CATALOG_IMAGE),
+          name="outfit_images")
+
+# Content-addressed outfit image blobs (see app/utils/blob_store.py): the URL
+# changes whenever the bytes do, so browsers and CDNs may cache them forever
+app.mount(BLOB_URL_PREFIX, CachingStaticFiles(directory=str(BLOB_STORE_ROOT), cache_control=CACHE_IMMUTABLE),
+          name="blobs")
 
 # Health check endpoint
 @app.get("/")
@@ -45,6 +70,13 @@ async def health():
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency histograms and cache counters in Prometheus text format"""
+    if not METRICS_ENABLED:
+        return PlainTextResponse("# metrics disabled (METRICS_ENABLED=false)\n", status_code=404)
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.services.outfit_processor import EXPORT_BATCH_SIZE, export_ndjson, parse_fields
+from app.services.repositories import STORAGE_BACKEND
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export_catalog(fields: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Stream the outfit catalog as NDJSON (chunked, constant memory).
+    fields: comma-separated list, "*" for everything, "vector" for the active embedding.
+    """
+    if STORAGE_BACKEND != "mongo":
+        raise HTTPException(
+            status_code=501,
+            detail=f"Catalog export reads MongoDB; not available with STORAGE_BACKEND={STORAGE_BACKEND}",
+        )
+    # A sync generator: Starlette pulls it in the threadpool, off the event loop
+    return StreamingResponse(
+        export_ndjson(parse_fields(fields), batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="outfits.ndjson"'},
+    )
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from app.services.thumbnail_service import (
+    CATALOG_ROOT, THUMBNAIL_ROOT, pick_width, thumbnail_path,
+)
+from app.utils.http_cache import CACHE_CATALOG_IMAGE, CACHE_REVALIDATE, cached_file
+
+router = APIRouter()
+
+
+def _inside(path, root) -> bool:
+    try:
+        path.resolve().relative_to(root.resolve())
+        return True
+    except ValueError:
+        return False
+
+
+@router.get("/outfit/{image_path:path}")
+async def get_outfit_image(image_path: str, request: Request, w: Optional[int] = None):
+    """Serve a precomputed WebP thumbnail of a catalog image (original as fallback)"""
+    width = pick_width(w)
+    thumb = thumbnail_path(image_path, width)
+    if _inside(thumb, THUMBNAIL_ROOT) and thumb.is_file():
+        return cached_file(request, thumb, cache_control=CACHE_CATALOG_IMAGE, media_type="image/webp")
+
+    original = CATALOG_ROOT / image_path
+    if not _inside(original, CATALOG_ROOT) or not original.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Same ?w= URL the thumbnail will have once generated: revalidate every
+    # time (a cheap 304) rather than pin the full-size original in caches
+    return cached_file(request, original, cache_control=CACHE_REVALIDATE)
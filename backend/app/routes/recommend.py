@@ -1,9 +1,29 @@
-from fastapi import APIRouter, HTTPException
+import json
+import os
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
 from pydantic import BaseModel
-from app.services.recommendation_engine import get_recommendations
-from typing import Optional
+from app.services.recommendation_engine import catalog_version, get_recommendations
+from app.services.recommendation_engine import collection as outfits_collection
+from app.services.repositories import STORAGE_BACKEND, catalog_repo
+from app.utils.http_cache import CACHE_SHORT, cached_json
+from app.utils.lru_cache import LRUCache
+from app.services.color_palette import get_color_index, palette_docs
+from app.services.thumbnail_service import thumbnail_url
+from typing import Literal, Optional
+from app.utils.logger import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Serialised /generate bodies keyed by (normalised request, catalog version).
+# Many users share a profile bucket, so identical requests are common; the
+# TTL bounds staleness for catalog writes that don't change the version.
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "2048"))
+RECOMMEND_CACHE_TTL  = float(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+recommend_responses  = LRUCache("recommend_response", maxsize=RECOMMEND_CACHE_SIZE, ttl=RECOMMEND_CACHE_TTL)
 
 class RecommendationRequest(BaseModel):
     image_id: str
@@ -16,34 +36,107 @@ class RecommendationRequest(BaseModel):
     height_category: Optional[str] = "Average"   # ← new field
 
 
+def _profile_value(value: Optional[str]) -> Optional[str]:
+    return (value or "").strip() or None
+
+
+def _filter_value(value: Optional[str]) -> Optional[str]:
+    return (value or "").strip().lower() or None
+
+
+def normalized_params(request: RecommendationRequest) -> dict:
+    """
+    The get_recommendations arguments, normalised. The engine receives
+    exactly these values, so two requests that share a cache key always
+    score the same way. Profile values are looked up case-sensitively
+    and echoed back, so only surrounding whitespace is dropped for them.
+    """
+    return {
+        "top_k":           request.top_k,
+        "body_type":       _profile_value(request.body_type),
+        "skin_tone":       _profile_value(request.skin_tone),
+        "height_category": _profile_value(request.height_category) or "Average",
+        "color":           _filter_value(request.color),
+        "sleeves":         _filter_value(request.sleeves),
+        "occasion":        _filter_value(request.occasion),
+    }
+
+
+def response_cache_key(params: dict, version: str) -> tuple:
+    """image_id is left out: scoring depends only on the detected profile, not on the photo."""
+    return (version, *sorted(params.items()))
+
+
 @router.post("/generate")
 async def generate_recommendations(request: RecommendationRequest):
     """Generate outfit recommendations"""
     try:
-        result = get_recommendations(
+        params = normalized_params(request)
+        key    = response_cache_key(params, await run_in_threadpool(catalog_version))
+        body   = recommend_responses.get(key)
+        if body is not None:
+            return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+        # Scoring is CPU-bound numpy on the sync client — keep it off the event loop
+        result = await run_in_threadpool(
+            get_recommendations,
             uploaded_image_path=request.image_id,
-            top_k=request.top_k,
-            color=request.color,
-            sleeves=request.sleeves,
-            occasion=request.occasion,
-            body_type=request.body_type,
-            skin_tone=request.skin_tone,
-            height_category=request.height_category or "Average",
+            **params,
         )
-        return result
+        body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+        # Failures (DB down, scoring error) are retried on the next request
+        if result.get("success"):
+            recommend_responses.set(key, body)
+        return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Recommendation route error: %s", e)
         return {"success": False, "error": str(e)}
 
 
+@router.get("/by-color")
+async def outfits_by_color(
+    color: str,
+    mode: Literal["rank", "contains"] = "rank",
+    top_k: int = Query(20, ge=1, le=200),
+    min_weight: float = Query(0.10, ge=0.0, le=1.0),
+):
+    """Outfits containing / closest to a colour name or #rrggbb, from the palette index"""
+    if STORAGE_BACKEND == "sqlite":
+        from app.services.storage_sqlite import get_store
+        load_docs = get_store().palette_docs
+    elif outfits_collection is None:
+        raise HTTPException(status_code=503, detail="Database not connected")
+    else:
+        # The engine's sync client, called inside the threadpool below. Importing
+        # app.utils.db here would run its index builds on the event loop.
+        load_docs = lambda: palette_docs(outfits_collection)
+    try:
+        index = await run_in_threadpool(get_color_index, load_docs)
+        if mode == "contains":
+            hits = [(int(i), None) for i in index.containing(color, min_weight=min_weight)[:top_k]]
+        else:
+            hits = index.rank(color, top_k=top_k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    outfits = []
+    for i, distance in hits:
+        doc = index.docs[i]
+        outfits.append({
+            "name":      doc.get("name"),
+            "category":  doc.get("category"),
+            "color":     doc.get("color"),
+            "image_url": thumbnail_url(doc.get("image_path", "")),
+            "distance":  None if distance is None else round(distance, 2),
+        })
+    return {"success": True, "color": color, "mode": mode, "outfits": outfits}
+
+
 @router.get("/status")
-async def get_status():
+async def get_status(request: Request):
     try:
-        from app.utils.db import db
-        count = db["outfits"].count_documents({})
-        return {"success": True, "total_outfits": count}
+        count = await catalog_repo.count()
+        return cached_json(request, {"success": True, "total_outfits": count}, cache_control=CACHE_SHORT)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, Request, UploadFile, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
 import uuid
 import os
 from pathlib import Path
-from app.utils.db import db
+from typing import Optional
+from app.services.repositories import features_repo, images_repo, users_repo
 from app.services.mediapipe_service import analyze_body_measurements
 from app.services.skin_tone_service import analyze_skin_tone
-import cv2
-import numpy as np
+from app.services.image_context import ImageContext
+from app.services.upload_store import decode_upload, stream_upload
+from app.utils.metrics import stage_timer
+from app.utils.http_cache import CACHE_IMMUTABLE_PRIVATE, CACHE_PRIVATE_SHORT, cached_file, cached_json
+from app.utils.lru_cache import LRUCache
+from app.utils.logger import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
-UPLOAD_DIR = Path("storage/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# image_id → (file path, sha256); uploads are write-once, so entries only
+# go stale on delete, which evicts them
+IMAGE_PATH_CACHE_SIZE = int(os.getenv("IMAGE_PATH_CACHE_SIZE", "10000"))
+image_paths = LRUCache("image_path", maxsize=IMAGE_PATH_CACHE_SIZE)
 
 
 @router.post("/upload")
@@ -27,44 +35,47 @@ async def upload_image(file: UploadFile = File(...), user_id: str = None):
             raise HTTPException(status_code=400, detail="File must be an image")
 
         image_id = str(uuid.uuid4())
-        file_extension = Path(file.filename).suffix
-        saved_filename = f"{image_id}{file_extension}"
-        file_path = UPLOAD_DIR / saved_filename
 
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        print(f"✅ File saved: {file_path}")
+        # Chunked copy to the sharded upload tree; rejects non-images / oversize early
+        with stage_timer("upload", "stream_write"):
+            file_path, file_size, file_sha256 = await stream_upload(file, image_id)
+        logger.debug("File saved: %s (%d bytes)", file_path, file_size)
 
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with stage_timer("upload", "decode"):
+            image = decode_upload(file_path)
         if image is None:
+            file_path.unlink(missing_ok=True)
             raise HTTPException(status_code=400, detail="Invalid image file")
 
+        # Shared grayscale / edge / HSV planes for both analyzers
+        image_ctx = ImageContext(image)
+
         # ── Step 1: body analysis (also returns raw_landmarks) ────────────────
-        body_analysis = analyze_body_measurements(image)
+        with stage_timer("upload", "body_analysis"):
+            body_analysis = analyze_body_measurements(image, context=image_ctx)
         raw_landmarks = body_analysis.pop("raw_landmarks", None)   # extract, don't store
-        print(f"✅ Body analysis done: {body_analysis['body_type']} / {body_analysis['height_category']}")
+        logger.debug("Body analysis done: %s / %s", body_analysis["body_type"], body_analysis["height_category"])
 
         # ── Step 2: skin tone — pass landmarks for accurate face crop ─────────
-        skin_analysis = analyze_skin_tone(image, raw_landmarks=raw_landmarks)
-        print(f"✅ Skin tone done: {skin_analysis['skin_tone']}")
+        with stage_timer("upload", "skin_tone"):
+            skin_analysis = analyze_skin_tone(image, raw_landmarks=raw_landmarks, context=image_ctx)
+        logger.debug("Skin tone done: %s", skin_analysis["skin_tone"])
 
         # ── Step 3: store to MongoDB ──────────────────────────────────────────
         user_id = user_id or "default_user"
 
-        user_images_collection = db["user_images"]
         image_doc = {
             "image_id":   image_id,
             "user_id":    user_id,
             "file_path":  str(file_path),
             "file_name":  file.filename,
             "uploaded_at": datetime.utcnow(),
-            "file_size":  len(contents),
+            "file_size":  file_size,
+            "sha256":     file_sha256,
         }
-        user_images_collection.insert_one(image_doc)
+        with stage_timer("upload", "db_insert_image"):
+            await images_repo.insert(image_doc)
 
-        user_features_collection = db["user_features"]
         features_doc = {
             "image_id":  image_id,
             "user_id":   user_id,
@@ -72,8 +83,9 @@ async def upload_image(file: UploadFile = File(...), user_id: str = None):
             **skin_analysis,
             "created_at": datetime.utcnow(),
         }
-        user_features_collection.insert_one(features_doc)
-        print(f"✅ Features saved to MongoDB: {image_id}")
+        with stage_timer("upload", "db_insert_features"):
+            await features_repo.insert(features_doc)
+        logger.info("Upload analyzed", extra={"fields": {"image_id": image_id, "user_id": user_id}})
 
         # ── Step 4: return everything the frontend needs ──────────────────────
         return {
@@ -96,18 +108,19 @@ async def upload_image(file: UploadFile = File(...), user_id: str = None):
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ Upload error: {str(e)}")
+        logger.exception("Upload error: %s", e)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 @router.get("/features/{image_id}")
-async def get_image_features(image_id: str):
+async def get_image_features(image_id: str, request: Request):
     """Get extracted features for an image"""
     try:
-        features = db["user_features"].find_one({"image_id": image_id}, {"_id": 0})
+        features = await features_repo.get(image_id)
         if not features:
             raise HTTPException(status_code=404, detail="Features not found")
-        return {"success": True, "features": features}
+        return cached_json(request, {"success": True, "features": features},
+                           cache_control=CACHE_PRIVATE_SHORT, last_modified=features.get("created_at"))
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -115,13 +128,14 @@ async def get_image_features(image_id: str):
 
 
 @router.get("/images/{user_id}")
-async def get_user_images(user_id: str):
-    """Get all images for a user"""
+async def get_user_images(user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get a user's images, newest first, one page at a time"""
     try:
-        images = list(db["user_images"].find(
-            {"user_id": user_id}, {"_id": 0}
-        ).sort("uploaded_at", -1))
-        return {"success": True, "user_id": user_id, "images": images, "total": len(images)}
+        images, next_cursor = await images_repo.page_for_user(user_id, limit=limit, cursor=cursor)
+        return {"success": True, "user_id": user_id, "images": images, "total": len(images),
+                "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -129,7 +143,7 @@ async def get_user_images(user_id: str):
 @router.get("/images/detail/{image_id}")
 async def get_image_detail(image_id: str):
     try:
-        image = db["user_images"].find_one({"image_id": image_id}, {"_id": 0})
+        image = await images_repo.get(image_id)
         if not image:
             raise HTTPException(status_code=404, detail="Image not found")
         return {"success": True, "image": image}
@@ -140,16 +154,22 @@ async def get_image_detail(image_id: str):
 
 
 @router.get("/image-file/{image_id}")
-async def get_image_file(image_id: str):
+async def get_image_file(image_id: str, request: Request):
     """Serve the actual image file for display"""
     try:
-        image_doc = db["user_images"].find_one({"image_id": image_id}, {"_id": 0})
-        if not image_doc:
-            raise HTTPException(status_code=404, detail="Image not found")
-        fp = Path(image_doc["file_path"])
+        entry = image_paths.get(image_id)
+        if entry is None:
+            image_doc = await images_repo.get(image_id)
+            if not image_doc:
+                raise HTTPException(status_code=404, detail="Image not found")
+            entry = (Path(image_doc["file_path"]), image_doc.get("sha256"))
+            image_paths.set(image_id, entry)
+        fp, sha256 = entry
         if not fp.exists():
+            image_paths.pop(image_id)
             raise HTTPException(status_code=404, detail="Image file not found on disk")
-        return FileResponse(str(fp), media_type="image/jpeg")
+        # Media type from the (sniffed) extension; uploads never change in place
+        return cached_file(request, fp, cache_control=CACHE_IMMUTABLE_PRIVATE, etag=sha256)
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -159,13 +179,13 @@ async def get_image_file(image_id: str):
 @router.delete("/images/{image_id}")
 async def delete_image(image_id: str):
     try:
-        image_doc = db["user_images"].find_one({"image_id": image_id})
+        image_paths.pop(image_id)
+        image_doc = await images_repo.delete(image_id)
+        await features_repo.delete(image_id)
         if image_doc and "file_path" in image_doc:
             fp = Path(image_doc["file_path"])
             if fp.exists():
                 fp.unlink()
-        db["user_images"].delete_one({"image_id": image_id})
-        db["user_features"].delete_one({"image_id": image_id})
         return {"success": True, "message": "Image deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -174,13 +194,10 @@ async def delete_image(image_id: str):
 @router.get("/user/{user_id}")
 async def get_user_profile(user_id: str):
     try:
-        users_collection = db["users"]
-        user = users_collection.find_one({"user_id": user_id}, {"_id": 0})
-        if not user:
-            user_doc = {"user_id": user_id, "created_at": datetime.utcnow()}
-            users_collection.insert_one(user_doc)
-            user = user_doc
-        image_count = db["user_images"].count_documents({"user_id": user_id})
+        user, image_count = await asyncio.gather(
+            users_repo.get_or_create(user_id),
+            images_repo.count_for_user(user_id),
+        )
         return {"success": True, "user": user, "image_count": image_count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -189,11 +206,7 @@ async def get_user_profile(user_id: str):
 @router.post("/user/{user_id}")
 async def update_user_profile(user_id: str, data: dict):
     try:
-        db["users"].update_one(
-            {"user_id": user_id},
-            {"$set": {**data, "updated_at": datetime.utcnow()}},
-            upsert=True
-        )
+        await users_repo.update(user_id, data)
         return {"success": True, "message": "User profile updated"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
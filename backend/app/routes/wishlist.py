@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from datetime import datetime
-from app.utils.db import db
+from typing import List, Optional
+from app.services.repositories import wishlist_repo
+from app.services.thumbnail_service import original_url, thumbnail_url
+from app.utils.logger import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 class WishlistItem(BaseModel):
     user_id: str
@@ -19,58 +22,69 @@ class RemoveWishlistItem(BaseModel):
 class ClearWishlist(BaseModel):
     user_id: str
 
+class BulkWishlistEntry(BaseModel):
+    outfit_name: str
+    similarity_score: float = 0.0
+    image_id: str = None
+    occasion: str = None
+
+class BulkAddWishlist(BaseModel):
+    user_id: str
+    items: List[BulkWishlistEntry]
+
+class BulkRemoveWishlist(BaseModel):
+    user_id: str
+    outfit_names: List[str]
+
+def hydrate_item(entry: dict) -> dict:
+    """Flatten the joined catalog outfit into the wishlist entry"""
+    outfit     = entry.pop("outfit", None) or {}
+    image_path = outfit.get("image_path")
+    return {
+        **entry,
+        "category":       outfit.get("category"),
+        "color":          outfit.get("color"),
+        "sleeves":        outfit.get("sleeves"),
+        "occasion":       entry.get("occasion") or outfit.get("occasion"),
+        "image_url":      thumbnail_url(image_path) if image_path else None,
+        "image_url_full": original_url(image_path) if image_path else None,
+        "in_catalog":     bool(outfit),
+    }
+
 @router.post("/add")
 async def add_to_wishlist(item: WishlistItem):
     """Add outfit to user's wishlist"""
     try:
-        wishlist_collection = db["wishlist"]
-        
-        # Check if already in wishlist
-        existing = wishlist_collection.find_one({
-            "user_id": item.user_id,
-            "outfit_name": item.outfit_name
+        item_id = await wishlist_repo.add(item.user_id, {
+            "outfit_name": item.outfit_name,
+            "similarity_score": item.similarity_score,
+            "image_id": item.image_id,
+            "occasion": item.occasion,
         })
         
-        if existing:
+        if item_id is None:
             return {
                 "success": True,
                 "message": "Already in wishlist"
             }
         
-        # Add to wishlist
-        wishlist_item = {
-            "user_id": item.user_id,
-            "outfit_name": item.outfit_name,
-            "similarity_score": item.similarity_score,
-            "image_id": item.image_id,
-            "occasion": item.occasion,
-            "saved_date": datetime.utcnow()
-        }
-        
-        result = wishlist_collection.insert_one(wishlist_item)
-        
         return {
             "success": True,
             "message": "Added to wishlist",
-            "item_id": str(result.inserted_id)
+            "item_id": item_id
         }
     
     except Exception as e:
-        print(f"Error adding to wishlist: {str(e)}")
+        logger.error("Error adding to wishlist: %s", e)
         raise HTTPException(status_code=500, detail=f"Error adding to wishlist: {str(e)}")
 
 @router.post("/remove")
 async def remove_from_wishlist(item: RemoveWishlistItem):
     """Remove outfit from user's wishlist"""
     try:
-        wishlist_collection = db["wishlist"]
-        
-        result = wishlist_collection.delete_one({
-            "user_id": item.user_id,
-            "outfit_name": item.outfit_name
-        })
+        deleted = await wishlist_repo.remove(item.user_id, item.outfit_name)
         
-        if result.deleted_count == 0:
+        if deleted == 0:
             raise HTTPException(status_code=404, detail="Item not found in wishlist")
         
         return {
@@ -81,58 +95,84 @@ async def remove_from_wishlist(item: RemoveWishlistItem):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error removing from wishlist: {str(e)}")
+        logger.error("Error removing from wishlist: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error removing from wishlist: {str(e)}")
+
+@router.post("/bulk-add")
+async def bulk_add_to_wishlist(data: BulkAddWishlist):
+    """Add several outfits to user's wishlist in one round trip"""
+    try:
+        added = await wishlist_repo.add_many(data.user_id, [entry.model_dump() for entry in data.items])
+        
+        return {
+            "success": True,
+            "message": f"Added {added} items to wishlist",
+            "added_count": added,
+            "already_saved": len(data.items) - added
+        }
+    
+    except Exception as e:
+        logger.error("Error bulk adding to wishlist: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error adding to wishlist: {str(e)}")
+
+@router.post("/bulk-remove")
+async def bulk_remove_from_wishlist(data: BulkRemoveWishlist):
+    """Remove several outfits from user's wishlist in one round trip"""
+    try:
+        removed = await wishlist_repo.remove_many(data.user_id, data.outfit_names)
+        
+        return {
+            "success": True,
+            "message": f"Removed {removed} items from wishlist",
+            "removed_count": removed
+        }
+    
+    except Exception as e:
+        logger.error("Error bulk removing from wishlist: %s", e)
         raise HTTPException(status_code=500, detail=f"Error removing from wishlist: {str(e)}")
 
 @router.post("/clear")
 async def clear_wishlist(data: ClearWishlist):
     """Clear entire wishlist for user"""
     try:
-        wishlist_collection = db["wishlist"]
-        
-        result = wishlist_collection.delete_many({
-            "user_id": data.user_id
-        })
+        deleted = await wishlist_repo.clear(data.user_id)
         
         return {
             "success": True,
-            "message": f"Cleared {result.deleted_count} items from wishlist",
-            "deleted_count": result.deleted_count
+            "message": f"Cleared {deleted} items from wishlist",
+            "deleted_count": deleted
         }
     
     except Exception as e:
-        print(f"Error clearing wishlist: {str(e)}")
+        logger.error("Error clearing wishlist: %s", e)
         raise HTTPException(status_code=500, detail=f"Error clearing wishlist: {str(e)}")
 
 @router.get("/get")
-async def get_wishlist(user_id: str):
-    """Get all wishlist items for user"""
+async def get_wishlist(user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get wishlist items for user, newest first, hydrated with catalog metadata"""
     try:
-        wishlist_collection = db["wishlist"]
-        
-        items = list(wishlist_collection.find(
-            {"user_id": user_id},
-            {"_id": 0}
-        ).sort("saved_date", -1))
+        entries, next_cursor = await wishlist_repo.page_hydrated(user_id, limit=limit, cursor=cursor)
+        items = [hydrate_item(entry) for entry in entries]
         
         return {
             "success": True,
             "user_id": user_id,
             "items": items,
-            "total": len(items)
+            "total": len(items),
+            "next_cursor": next_cursor
         }
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error fetching wishlist: {str(e)}")
+        logger.error("Error fetching wishlist: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching wishlist: {str(e)}")
 
 @router.get("/count")
 async def get_wishlist_count(user_id: str):
     """Get wishlist count for user"""
     try:
-        wishlist_collection = db["wishlist"]
-        
-        count = wishlist_collection.count_documents({"user_id": user_id})
+        count = await wishlist_repo.count(user_id)
         
         return {
             "success": True,
@@ -141,5 +181,5 @@ async def get_wishlist_count(user_id: str):
         }
     
     except Exception as e:
-        print(f"Error getting wishlist count: {str(e)}")
+        logger.error("Error getting wishlist count: %s", e)
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Catalog Manifest - remembers what was embedded, so re-indexing only
+touches files that are new or changed.
+
+One JSON file maps image_path (relative to outfit_images/) to:
+    size, mtime, sha256, model_version
+
+A file is "unchanged" when size + mtime match (no read needed), or when
+they differ but the content hash is still the same (e.g. after a copy
+that reset mtimes). A model_version change marks every file as changed.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+
+DEFAULT_MANIFEST_PATH = os.getenv("CATALOG_MANIFEST", "storage/catalog_manifest.json")
+
+
+def manifest_path_for(version: str) -> str:
+    """One manifest per embedding version, so spaces are built independently."""
+    root, ext = os.path.splitext(DEFAULT_MANIFEST_PATH)
+    return f"{root}.{version}{ext}"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CatalogManifest:
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self._staged: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def diff(self, files: Dict[str, str], model_version: str) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Compare the catalog on disk against the manifest.
+
+        files: {image_path: absolute/relative filesystem path}
+        Returns (changed, unchanged, removed) lists of image_path keys.
+        New files count as changed. Stat/hash results for changed files
+        are staged and only persisted by mark_done().
+        """
+        changed, unchanged = [], []
+        self._staged = {}
+
+        for key, fs_path in files.items():
+            st    = os.stat(fs_path)
+            prev  = self.entries.get(key)
+            entry = {"size": st.st_size, "mtime": st.st_mtime, "model_version": model_version}
+
+            if prev and prev.get("model_version") == model_version:
+                if prev.get("size") == st.st_size and prev.get("mtime") == st.st_mtime:
+                    unchanged.append(key)
+                    continue
+                entry["sha256"] = file_sha256(fs_path)
+                if prev.get("sha256") == entry["sha256"]:
+                    self.entries[key] = entry
+                    unchanged.append(key)
+                    continue
+            else:
+                entry["sha256"] = file_sha256(fs_path)
+
+            self._staged[key] = entry
+            changed.append(key)
+
+        removed = [key for key in self.entries if key not in files]
+        return changed, unchanged, removed
+
+    def mark_done(self, keys: List[str]) -> None:
+        """Commit staged entries for keys that were embedded and written."""
+        for key in keys:
+            if key in self._staged:
+                self.entries[key] = self._staged.pop(key)
+
+    def forget(self, keys: List[str]) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a torn manifest."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
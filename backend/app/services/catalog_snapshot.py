@@ -0,0 +1,223 @@
+"""
+Catalog Snapshot - one memory-mapped copy of the scoring catalog, shared
+by every uvicorn worker.
+
+A snapshot is a single structured .npy file with one record per outfit:
+its card fields (name, category, colour, sleeves, occasion, image_path)
+and its folded 13-dim projection, norm and embedding_dim (see
+app/utils/embeddings.py). Workers open it with np.load(mmap_mode="r").
+The OS page cache holds one physical copy however many processes attach,
+so one worker per core no longer multiplies catalog RAM, and a request
+does no catalog fetch at all.
+
+Publishing is atomic:
+
+    storage/catalog_snapshot/
+        snap-20261019T120000-4242/catalog.npy    ← written in full first
+        CURRENT                                  ← then this pointer is os.replace()d
+
+CURRENT is a small JSON document naming the snapshot dir plus the
+storage backend and embedding version it was built from. Workers re-read
+it at most every CATALOG_SNAPSHOT_CHECK seconds and attach to the new
+file. Requests already scoring against the old mapping finish on it.
+Older snapshot dirs are pruned, and on POSIX an unlinked file stays
+readable for any process that still maps it.
+
+The engine only scores a snapshot whose embedding version matches the
+live catalog_meta pointer (see live_snapshot() in recommendation_engine).
+After an activate/rollback it falls back to querying storage until a
+matching snapshot is published. Everything that writes the catalog calls
+refresh_published() to rebuild it when done: set_active_version(),
+rollback(), mobilenet_service ingest, CatalogWriter.close() (add_outfits,
+bulk_insert_outfits, patch_sleeve_values), the migrate_* scripts and
+storage_sqlite import-catalog. Manual control:
+
+    python -m app.services.catalog_snapshot build
+    python -m app.services.catalog_snapshot status
+
+Without a CURRENT pointer the engine queries storage per request.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.utils.embeddings import FOLD_STRIDE
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_ROOT  = Path(os.getenv("CATALOG_SNAPSHOT_DIR", "storage/catalog_snapshot"))
+CHECK_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_CHECK", "5"))
+KEEP_SNAPSHOTS = 3
+POINTER_NAME   = "CURRENT"
+CARD_FIELDS    = ("name", "category", "color", "sleeves", "occasion", "image_path")
+
+
+class CatalogSnapshot:
+    """Read-only view over one published snapshot file."""
+
+    def __init__(self, path: Path, embedding_version: Optional[str] = None, storage: Optional[str] = None):
+        self.path              = path
+        self.version           = path.name
+        self.embedding_version = embedding_version
+        self.storage           = storage
+        self.records           = np.load(path / "catalog.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def vectors(self, limit: int):
+        """(folded, norms, dims) views into the mapping — no copy."""
+        rows = self.records[:limit]
+        return rows["folded"], rows["norm"], rows["dim"]
+
+    def cards(self, limit: int) -> List[dict]:
+        rows = self.records[:limit]
+        columns = {field: rows[field].tolist() for field in CARD_FIELDS}
+        return [dict(zip(CARD_FIELDS, values)) for values in zip(*columns.values())]
+
+
+_state = {"snapshot": None, "checked_at": 0.0}
+_lock  = threading.Lock()
+
+
+def _read_pointer() -> Optional[dict]:
+    """{"name", "embedding_version", "storage"} of the published snapshot, or None."""
+    try:
+        pointer = json.loads((SNAPSHOT_ROOT / POINTER_NAME).read_text())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning("Unreadable %s pointer — rebuild the catalog snapshot", POINTER_NAME)
+        return None
+    return pointer if pointer.get("name") else None
+
+
+def _open(pointer: dict) -> CatalogSnapshot:
+    return CatalogSnapshot(SNAPSHOT_ROOT / pointer["name"],
+                           pointer.get("embedding_version"), pointer.get("storage"))
+
+
+def current_snapshot() -> Optional[CatalogSnapshot]:
+    """The published snapshot this worker should score against (None if none)."""
+    now = time.monotonic()
+    if now - _state["checked_at"] < CHECK_INTERVAL:
+        return _state["snapshot"]
+
+    with _lock:
+        if now - _state["checked_at"] < CHECK_INTERVAL:
+            return _state["snapshot"]
+        _state["checked_at"] = now
+        pointer  = _read_pointer()
+        attached = _state["snapshot"]
+        if pointer is None:
+            _state["snapshot"] = None
+        elif attached is None or attached.version != pointer["name"]:
+            try:
+                _state["snapshot"] = _open(pointer)
+                logger.info("Attached catalog snapshot %s (%d outfits, embedding version %s)",
+                            pointer["name"], len(_state["snapshot"]), pointer.get("embedding_version"))
+            except (OSError, ValueError) as e:
+                logger.error("Could not attach catalog snapshot %s: %s", pointer["name"], e)
+        return _state["snapshot"]
+
+
+# ── Publishing ────────────────────────────────────────────────────────────────
+def _record_dtype(cards: List[dict]) -> np.dtype:
+    def width(field):
+        return max([len(str(card.get(field) or "")) for card in cards] + [1])
+    return np.dtype(
+        [(field, f"<U{width(field)}") for field in CARD_FIELDS]
+        + [("folded", "<f4", (FOLD_STRIDE,)), ("norm", "<f4"), ("dim", "<i4")]
+    )
+
+
+def build_snapshot(limit: int = 10_000_000) -> Path:
+    """Write a new snapshot from the configured storage and publish it atomically."""
+    # Imported lazily: the engine itself imports current_snapshot from here
+    from app.services.recommendation_engine import fetch_catalog, load_folded
+    from app.services.repositories import STORAGE_BACKEND
+
+    outfits, embedding_version, fetch_vectors = fetch_catalog(limit)
+    folded, norms, dims, _ = load_folded(outfits, embedding_version, fetch_vectors)
+
+    cards   = [{field: (outfit.get(field) or "") for field in CARD_FIELDS} for outfit in outfits]
+    records = np.zeros(len(cards), dtype=_record_dtype(cards))
+    for field in CARD_FIELDS:
+        records[field] = [card[field] for card in cards]
+    records["folded"], records["norm"], records["dim"] = folded, norms, dims
+
+    name = f"snap-{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}"
+    path = SNAPSHOT_ROOT / name
+    path.mkdir(parents=True, exist_ok=False)
+    np.save(path / "catalog.npy", records)
+
+    pointer_tmp = SNAPSHOT_ROOT / f"{POINTER_NAME}.{os.getpid()}.tmp"
+    pointer_tmp.write_text(json.dumps(
+        {"name": name, "embedding_version": embedding_version, "storage": STORAGE_BACKEND}
+    ))
+    os.replace(pointer_tmp, SNAPSHOT_ROOT / POINTER_NAME)
+    logger.info("Published catalog snapshot %s (%d outfits, embedding version %s)",
+                name, len(records), embedding_version)
+
+    _prune(keep=name)
+    return path
+
+
+def refresh_published() -> Optional[Path]:
+    """
+    Rebuild the snapshot after the catalog or the active embedding version
+    changed. Does nothing on deployments that never published one. Never
+    raises: the engine already ignores a stale snapshot, so a failed
+    rebuild only costs speed.
+    """
+    if _read_pointer() is None:
+        return None
+    try:
+        return build_snapshot()
+    except Exception as e:
+        logger.error("Catalog snapshot rebuild failed, engine will query storage: %s", e)
+        return None
+
+
+def _prune(keep: str) -> None:
+    snapshots = sorted(p for p in SNAPSHOT_ROOT.glob("snap-*") if p.is_dir())
+    for old in snapshots[:-KEEP_SNAPSHOTS]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Shared memory-mapped catalog snapshots")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="build and atomically publish a new snapshot")
+    sub.add_parser("status")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        path = build_snapshot()
+        print(f"✅ Published {path}")
+    elif args.cmd == "status":
+        pointer = _read_pointer()
+        if pointer is None:
+            print("No snapshot published — the engine queries storage per request")
+        else:
+            snapshot = _open(pointer)
+            size_mb  = (snapshot.path / "catalog.npy").stat().st_size / 1e6
+            print(f"Current: {snapshot.version}  ({len(snapshot)} outfits, {size_mb:.1f} MB, "
+                  f"storage {snapshot.storage}, embedding version {snapshot.embedding_version})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,193 @@
+"""
+Color Palette - dominant-colour palettes per outfit and a catalog-wide
+colour index.
+
+Ingest (PaletteExtractor in mobilenet_service.py):
+  extract_palette() runs a small vectorised k-means in CIE LAB on a 64×64
+  downsample. Pixels close to the border colour (the studio backdrop) are
+  dropped first. The top colours and their pixel shares are stored as one
+  compact blob, k × (L, a, b, weight) float16 (40 bytes for k=5):
+
+      palette      Binary
+      palette_k    int
+
+Query (ColorIndex):
+  All palettes are loaded once into (N, k, 3) / (N, k) arrays. "Outfits
+  containing this colour" and "rank by colour distance" are then a single
+  NumPy pass over the catalog, with no per-request image work.
+"""
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from bson.binary import Binary
+
+PALETTE_K      = 5
+PALETTE_SAMPLE = 64
+KMEANS_ITERS   = 12
+
+# Perceptual thresholds (CIE76 ΔE in LAB units)
+BACKGROUND_DELTA_E = 10.0
+CONTAINS_DELTA_E   = 22.0
+
+# Reference colours for the same vocabulary the catalog already uses
+NAMED_COLORS_HEX = {
+    "red":    "#c0262d",
+    "orange": "#e8792b",
+    "yellow": "#efd13b",
+    "green":  "#3e8e41",
+    "blue":   "#2f5fb3",
+    "purple": "#7b3fa0",
+    "pink":   "#ec8fb5",
+    "brown":  "#7b5230",
+    "white":  "#f4f4f2",
+    "black":  "#141414",
+    "grey":   "#8c8c8c",
+}
+
+
+def _bgr_to_lab(bgr: np.ndarray) -> np.ndarray:
+    """uint8 BGR (..., 3) → float32 LAB with L in [0, 100]."""
+    flat = np.asarray(bgr, dtype=np.float32).reshape(-1, 1, 3) / 255.0
+    return cv2.cvtColor(flat, cv2.COLOR_BGR2LAB).reshape(np.shape(bgr))
+
+
+def parse_color(color: str) -> np.ndarray:
+    """LAB value for a catalog colour name or a "#rrggbb" hex string."""
+    value = NAMED_COLORS_HEX.get(color.lower().strip(), color.strip())
+    if not (value.startswith("#") and len(value) == 7):
+        raise ValueError(f"Unknown colour: {color!r}")
+    r, g, b = (int(value[i:i + 2], 16) for i in (1, 3, 5))
+    return _bgr_to_lab(np.array([b, g, r], dtype=np.uint8))
+
+
+NAMED_COLORS_LAB = {name: parse_color(name) for name in NAMED_COLORS_HEX}
+
+
+# ── Extraction ────────────────────────────────────────────────────────────────
+def _kmeans(points: np.ndarray, k: int, iters: int = KMEANS_ITERS) -> Tuple[np.ndarray, np.ndarray]:
+    """Plain Lloyd's k-means, vectorised over all points. Returns (centers, counts)."""
+    # Deterministic init: spread seeds along the lightness order
+    order   = np.argsort(points[:, 0])
+    centers = points[order[np.linspace(0, len(points) - 1, k).astype(int)]].copy()
+
+    for _ in range(iters):
+        dists  = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)   # (P, k)
+        labels = dists.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums   = np.stack([np.bincount(labels, weights=points[:, c], minlength=k) for c in range(3)], axis=1)
+        filled = counts > 0
+        updated = centers.copy()
+        updated[filled] = sums[filled] / counts[filled, None]
+        if np.abs(updated - centers).max() < 0.5:
+            centers = updated
+            break
+        centers = updated
+    return centers, counts
+
+
+def extract_palette(img: np.ndarray, k: int = PALETTE_K) -> np.ndarray:
+    """
+    Dominant colours of a decoded BGR image as a (k', 4) float32 array of
+    (L, a, b, weight), sorted by weight, k' ≤ k.
+    """
+    small  = cv2.resize(img, (PALETTE_SAMPLE, PALETTE_SAMPLE), interpolation=cv2.INTER_AREA)
+    lab    = _bgr_to_lab(small).reshape(-1, 3)
+
+    # Drop the backdrop: pixels close to the median border colour
+    border = np.concatenate([
+        _bgr_to_lab(small[0]), _bgr_to_lab(small[-1]),
+        _bgr_to_lab(small[:, 0]), _bgr_to_lab(small[:, -1]),
+    ])
+    backdrop   = np.median(border, axis=0)
+    foreground = np.linalg.norm(lab - backdrop, axis=1) > BACKGROUND_DELTA_E
+    if foreground.sum() >= len(lab) * 0.05:
+        lab = lab[foreground]
+
+    centers, counts = _kmeans(lab, min(k, len(lab)))
+    keep    = counts > 0
+    weights = counts[keep] / counts[keep].sum()
+    palette = np.column_stack([centers[keep], weights]).astype(np.float32)
+    return palette[np.argsort(-palette[:, 3])]
+
+
+def encode_palette(palette: np.ndarray) -> dict:
+    return {
+        "palette":   Binary(np.asarray(palette, dtype="<f2").tobytes()),
+        "palette_k": int(len(palette)),
+    }
+
+
+def decode_palette(doc: dict) -> Optional[np.ndarray]:
+    blob = doc.get("palette")
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype="<f2").astype(np.float32).reshape(-1, 4)
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+def palette_docs(collection) -> List[dict]:
+    return list(collection.find(
+        {"palette": {"$exists": True}},
+        {"_id": 0, "name": 1, "category": 1, "color": 1, "image_path": 1, "palette": 1},
+    ))
+
+
+class ColorIndex:
+    """In-memory palette matrix for the whole catalog."""
+
+    def __init__(self, docs: List[dict], k: int = PALETTE_K):
+        n = len(docs)
+        self.docs    = docs
+        self.lab     = np.zeros((n, k, 3), dtype=np.float32)
+        self.weights = np.zeros((n, k), dtype=np.float32)   # 0 weight = empty slot
+        for i, doc in enumerate(docs):
+            palette = decode_palette(doc)
+            if palette is None:
+                continue
+            m = min(k, len(palette))
+            self.lab[i, :m]     = palette[:m, :3]
+            self.weights[i, :m] = palette[:m, 3]
+
+    @classmethod
+    def load(cls, collection) -> "ColorIndex":
+        return cls(palette_docs(collection))
+
+    def _distances(self, target_lab: np.ndarray) -> np.ndarray:
+        return np.linalg.norm(self.lab - target_lab, axis=2)             # (N, k)
+
+    def containing(self, color: str, min_weight: float = 0.10,
+                   max_delta_e: float = CONTAINS_DELTA_E) -> np.ndarray:
+        """Indices of outfits with ≥ min_weight of their pixels near `color`."""
+        near  = self._distances(parse_color(color)) <= max_delta_e
+        share = (self.weights * near).sum(axis=1)
+        hits  = np.nonzero(share >= min_weight)[0]
+        return hits[np.argsort(-share[hits])]
+
+    def rank(self, color: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """
+        Closest outfits to `color`: per outfit, the weight-adjusted distance
+        of its best-matching palette entry (lower is better).
+        """
+        dists  = self._distances(parse_color(color))
+        scored = np.where(self.weights > 0, dists / np.sqrt(np.maximum(self.weights, 1e-3)), np.inf)
+        best   = scored.min(axis=1)
+        top    = np.argsort(best)[:top_k]
+        return [(int(i), float(best[i])) for i in top if np.isfinite(best[i])]
+
+
+_index = {"value": None, "loaded_at": 0.0}
+COLOR_INDEX_TTL = 300.0
+
+
+def get_color_index(load_docs: Callable[[], List[dict]]) -> ColorIndex:
+    """
+    Process-wide ColorIndex, rebuilt at most every COLOR_INDEX_TTL seconds
+    from whatever the storage backend's `load_docs()` returns.
+    """
+    now = time.monotonic()
+    if _index["value"] is None or now - _index["loaded_at"] > COLOR_INDEX_TTL:
+        _index["value"], _index["loaded_at"] = ColorIndex(load_docs()), now
+    return _index["value"]
@@ -0,0 +1,212 @@
+"""
+Embedding Backend - pluggable MobileNetV2 (ImageNet, avg-pooled, 1280-d)
+inference for catalog ingestion and any query-time embedding.
+
+Backends:
+    keras   full TensorFlow + tf.keras.applications.MobileNetV2
+            (slow to import, large RSS; the reference implementation)
+    onnx    ONNX Runtime on CPU using an exported .onnx file
+    tflite  TFLite interpreter (tflite_runtime if installed, else tf.lite)
+
+All backends take an (N, 224, 224, 3) float32 batch already scaled to
+[-1, 1] and return raw (un-normalised) (N, 1280) float32 features.
+
+EMBED_BACKEND=auto (default) picks onnx, then tflite, whenever the model
+file exists and loads, and falls back to keras otherwise.
+
+Export once, then check parity against Keras:
+    python -m app.services.embedding_backend export --format onnx
+    python -m app.services.embedding_backend parity --backend onnx --images 64
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MODELS_DIR       = os.getenv("EMBED_MODELS_DIR", "models")
+ONNX_MODEL_PATH  = os.getenv("EMBED_ONNX_PATH",   os.path.join(MODELS_DIR, "mobilenet_v2_avg.onnx"))
+TFLITE_MODEL_PATH = os.getenv("EMBED_TFLITE_PATH", os.path.join(MODELS_DIR, "mobilenet_v2_avg.tflite"))
+EMBED_BACKEND    = os.getenv("EMBED_BACKEND", "auto").lower()
+EMBED_THREADS    = int(os.getenv("EMBED_THREADS", "0"))  # 0 → runtime default
+
+EMBEDDING_DIM = 1280
+
+# Parity thresholds on L2-normalised vectors
+PARITY_MIN_COSINE  = 0.9999
+PARITY_MAX_ABS_ERR = 1e-3
+
+
+def _build_keras_model():
+    import tensorflow as tf
+    model = tf.keras.applications.MobileNetV2(
+        weights="imagenet",
+        include_top=False,
+        pooling="avg",
+        input_shape=(224, 224, 3)
+    )
+    model.trainable = False
+    return model
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self):
+        self.model = _build_keras_model()
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch), dtype=np.float32)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_path: str = ONNX_MODEL_PATH):
+        import onnxruntime as ort
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path}")
+        options = ort.SessionOptions()
+        if EMBED_THREADS:
+            options.intra_op_num_threads = EMBED_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        out = self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+        return np.asarray(out, dtype=np.float32)
+
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, model_path: str = TFLITE_MODEL_PATH):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"TFLite model not found: {model_path}")
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=EMBED_THREADS or None)
+        self.input_index  = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self._batch = None
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        if self._batch != len(batch):
+            self.interpreter.resize_tensor_input(self.input_index, list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self._batch = len(batch)
+        self.interpreter.set_tensor(self.input_index, batch.astype(np.float32, copy=False))
+        self.interpreter.invoke()
+        return np.array(self.interpreter.get_tensor(self.output_index), dtype=np.float32)
+
+
+BACKENDS = {"keras": KerasBackend, "onnx": OnnxBackend, "tflite": TFLiteBackend}
+
+
+def load_backend(name: str = EMBED_BACKEND):
+    """Instantiate the requested backend; "auto" prefers the exported models."""
+    if name != "auto":
+        return BACKENDS[name]()
+    for candidate in ("onnx", "tflite"):
+        try:
+            return BACKENDS[candidate]()
+        except (ImportError, FileNotFoundError):
+            continue
+        except Exception as e:
+            # Corrupt or incompatible model file: Keras still works, so don't give up
+            logger.warning("Embedding backend %s failed to load, trying the next one: %s", candidate, e)
+            continue
+    return KerasBackend()
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+def export_onnx(path: str = ONNX_MODEL_PATH) -> str:
+    import tensorflow as tf
+    import tf2onnx
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    spec = (tf.TensorSpec((None, 224, 224, 3), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(_build_keras_model(), input_signature=spec, opset=13, output_path=path)
+    return path
+
+
+def export_tflite(path: str = TFLITE_MODEL_PATH) -> str:
+    import tensorflow as tf
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    converter = tf.lite.TFLiteConverter.from_keras_model(_build_keras_model())
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+
+# ── Parity check ─────────────────────────────────────────────────────────────
+def _load_sample_batch(image_dir: str, count: int) -> np.ndarray:
+    import cv2
+    files = sorted(glob.glob(os.path.join(image_dir, "*", "*.jpg")))[:count]
+    if not files:
+        raise FileNotFoundError(f"No .jpg images under {image_dir}/*/")
+    batch = []
+    for path in files:
+        img = cv2.resize(cv2.imread(path), (224, 224))
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype(np.float32)
+        batch.append(img / 127.5 - 1.0)
+    return np.stack(batch)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def check_parity(candidate, reference, batch: np.ndarray) -> dict:
+    """Compare normalised vectors of two backends on the same batch."""
+    a = _normalize(candidate.embed(batch))
+    b = _normalize(reference.embed(batch))
+    cosines = np.sum(a * b, axis=1)
+    report = {
+        "images":      len(batch),
+        "min_cosine":  float(cosines.min()),
+        "max_abs_err": float(np.abs(a - b).max()),
+    }
+    report["ok"] = (report["min_cosine"] >= PARITY_MIN_COSINE and
+                    report["max_abs_err"] <= PARITY_MAX_ABS_ERR)
+    return report
+
+
+def _main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export / verify MobileNetV2 embedding backends")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    exp = sub.add_parser("export", help="export the pooled Keras model")
+    exp.add_argument("--format", choices=["onnx", "tflite"], default="onnx")
+
+    par = sub.add_parser("parity", help="compare a backend against Keras")
+    par.add_argument("--backend", choices=["onnx", "tflite"], default="onnx")
+    par.add_argument("--images", type=int, default=32)
+    par.add_argument("--image-dir", default="outfit_images")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "export":
+        path = export_onnx() if args.format == "onnx" else export_tflite()
+        print(f"✅ Exported {args.format} model → {path}")
+        return 0
+
+    batch  = _load_sample_batch(args.image_dir, args.images)
+    report = check_parity(BACKENDS[args.backend](), KerasBackend(), batch)
+    status = "✅ PASS" if report["ok"] else "❌ FAIL"
+    print(f"{status} {args.backend} vs keras on {report['images']} images: "
+          f"min cosine={report['min_cosine']:.6f}  max |Δ|={report['max_abs_err']:.2e}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
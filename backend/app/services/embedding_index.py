@@ -0,0 +1,159 @@
+"""
+Embedding Index - blue/green switching between embedding spaces.
+
+Outfits can carry several vectors side by side under
+`embeddings.<version>` (MobileNetV2, colour histogram, a re-trained model,
+...). A new space is built in the background without touching the live
+one:
+
+    python -m app.services.mobilenet_service --embedding-version mnv2_2026_10 --full
+
+The engine scores against whichever version the pointer document in
+`catalog_meta` names. The pointer is only moved once the new space covers
+every outfit that has an image, so live traffic never sees a half-built catalog. Switching
+is a single-document write, and rollback just swaps `active` with
+`previous`:
+
+    python -m app.services.embedding_index status
+    python -m app.services.embedding_index activate mnv2_2026_10
+    python -m app.services.embedding_index rollback
+    python -m app.services.embedding_index drop color_hist-hsv-96
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.utils.embeddings import validate_version
+
+POINTER_ID = "embedding_index"
+
+# How long the engine may serve a cached pointer before re-reading it
+ACTIVE_VERSION_TTL = float(os.getenv("EMBEDDING_VERSION_TTL", "5"))
+
+_cache = {"version": None, "fetched_at": 0.0}
+
+
+def _meta(db):
+    return db["catalog_meta"]
+
+
+def get_active_version(db, use_cache: bool = True) -> Optional[str]:
+    """Active embedding version, or None to fall back to the top-level embedding."""
+    now = time.monotonic()
+    if use_cache and now - _cache["fetched_at"] < ACTIVE_VERSION_TTL:
+        return _cache["version"]
+    pointer = _meta(db).find_one({"_id": POINTER_ID}, {"active": 1}) or {}
+    _cache["version"], _cache["fetched_at"] = pointer.get("active"), now
+    return _cache["version"]
+
+
+def version_status(db, version: str) -> dict:
+    """
+    Coverage of `version` over the outfits that can be embedded at all:
+    name-only docs (add_outfits.py, bulk_insert_outfits.py) have no image,
+    and failed extractions (embedding_dim 0) don't count as built.
+    """
+    outfits    = db["outfits"]
+    embeddable = {"image_path": {"$exists": True}}
+    total      = outfits.count_documents(embeddable)
+    built      = outfits.count_documents(
+        {**embeddable, f"embeddings.{validate_version(version)}.embedding_dim": {"$gt": 0}}
+    )
+    return {"version": version, "built": built, "total": total, "complete": total > 0 and built == total}
+
+
+def _refresh_snapshot() -> None:
+    # Lazy: catalog_snapshot pulls in the engine, which imports this module
+    from app.services.catalog_snapshot import refresh_published
+    refresh_published()
+
+
+def set_active_version(db, version: str, force: bool = False, refresh_snapshot: bool = True) -> dict:
+    """
+    Atomically point the engine at `version` (must be fully built unless
+    force), then rebuild the published catalog snapshot for it.
+    """
+    status = version_status(db, version)
+    if not status["complete"] and not force:
+        raise RuntimeError(
+            f"Version {version} covers {status['built']}/{status['total']} outfits — refusing to activate"
+        )
+    current = get_active_version(db, use_cache=False)
+    _meta(db).update_one(
+        {"_id": POINTER_ID},
+        {
+            "$set":  {"active": version, "previous": current, "switched_at": datetime.utcnow()},
+            "$push": {"history": {"$each": [{"active": version, "at": datetime.utcnow()}], "$slice": -20}},
+        },
+        upsert=True,
+    )
+    _cache["fetched_at"] = 0.0
+    if refresh_snapshot:
+        _refresh_snapshot()
+    return status
+
+
+def rollback(db) -> Optional[str]:
+    """Swap active and previous; returns the version now active."""
+    pointer = _meta(db).find_one({"_id": POINTER_ID}) or {}
+    previous = pointer.get("previous")
+    if not previous:
+        raise RuntimeError("No previous embedding version to roll back to")
+    _meta(db).update_one(
+        {"_id": POINTER_ID, "active": pointer.get("active")},   # no-op if someone switched meanwhile
+        {"$set": {"active": previous, "previous": pointer.get("active"), "switched_at": datetime.utcnow()}},
+    )
+    _cache["fetched_at"] = 0.0
+    _refresh_snapshot()
+    return previous
+
+
+def drop_version(db, version: str) -> int:
+    pointer = _meta(db).find_one({"_id": POINTER_ID}) or {}
+    if version in (pointer.get("active"), pointer.get("previous")):
+        raise RuntimeError(f"Refusing to drop {version}: it is the active or rollback version")
+    result = db["outfits"].update_many(
+        {f"embeddings.{validate_version(version)}": {"$exists": True}},
+        {"$unset": {f"embeddings.{version}": ""}},
+    )
+    return result.modified_count
+
+
+def _main(argv=None) -> int:
+    from app.utils.db import db
+
+    parser = argparse.ArgumentParser(description="Manage blue/green embedding versions")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status")
+    act = sub.add_parser("activate")
+    act.add_argument("version")
+    act.add_argument("--force", action="store_true", help="activate even if incomplete")
+    sub.add_parser("rollback")
+    drop = sub.add_parser("drop")
+    drop.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "status":
+        pointer = _meta(db).find_one({"_id": POINTER_ID}) or {}
+        print(f"Active:   {pointer.get('active')}")
+        print(f"Previous: {pointer.get('previous')}")
+        for version in (pointer.get("active"), pointer.get("previous")):
+            if version:
+                s = version_status(db, version)
+                print(f"   {version}: {s['built']}/{s['total']} outfits")
+    elif args.cmd == "activate":
+        s = set_active_version(db, args.version, force=args.force)
+        print(f"✅ Active embedding version → {args.version} ({s['built']}/{s['total']} outfits)")
+    elif args.cmd == "rollback":
+        print(f"✅ Rolled back to {rollback(db)}")
+    elif args.cmd == "drop":
+        print(f"✅ Removed {args.version} from {drop_version(db, args.version)} outfits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
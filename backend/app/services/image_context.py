@@ -0,0 +1,95 @@
+"""
+Image Context - per-request cache of derived image planes.
+
+The body and skin analyzers all work on the same uploaded photo. Instead of
+each helper re-running cvtColor / GaussianBlur / Canny on its own ROI, one
+ImageContext is created per request and every derived plane is computed
+lazily, on first use, and then shared.
+
+Edge maps are only built for the torso band (shoulder → hip, plus padding).
+A row-wise cumulative sum of the edge map is kept alongside it, so the
+"which columns contain an edge" question for any horizontal band becomes a
+single subtraction instead of a fresh Canny pipeline.
+"""
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+
+class ImageContext:
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.h, self.w = image.shape[:2]
+
+        self._rgb  = None
+        self._gray = None
+        self._hsv  = None
+
+        self._band: Optional[Tuple[int, int]] = None
+        self._band_blur  = None
+        self._band_edges = None
+        self._edge_cumsum = None
+
+    # ── Full-image planes ─────────────────────────────────────────────────
+    @property
+    def rgb(self) -> np.ndarray:
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    # ── Torso band ────────────────────────────────────────────────────────
+    def set_torso_band(self, y1: int, y2: int) -> None:
+        """Declare the row range that edge lookups will be made in."""
+        y1 = max(0, int(y1))
+        y2 = min(self.h, int(y2))
+        if self._band == (y1, y2):
+            return
+        self._band       = (y1, y2)
+        self._band_blur  = None
+        self._band_edges = None
+        self._edge_cumsum = None
+
+    @property
+    def band_blurred(self) -> np.ndarray:
+        if self._band_blur is None:
+            y1, y2 = self._band or (0, self.h)
+            self._band_blur = cv2.GaussianBlur(self.gray[y1:y2], (5, 5), 0)
+        return self._band_blur
+
+    @property
+    def band_edges(self) -> np.ndarray:
+        if self._band_edges is None:
+            self._band_edges = cv2.Canny(self.band_blurred, 20, 80)
+        return self._band_edges
+
+    def edge_column_counts(self, y1: int, y2: int, x1: int, x2: int) -> np.ndarray:
+        """
+        Number of edge pixels per column inside rows [y1, y2) and columns
+        [x1, x2). Rows outside the declared torso band grow the band once.
+        """
+        band_y1, band_y2 = self._band or (0, self.h)
+        if y1 < band_y1 or y2 > band_y2:
+            self.set_torso_band(min(y1, band_y1), max(y2, band_y2))
+            band_y1, band_y2 = self._band
+
+        if self._edge_cumsum is None:
+            hits = (self.band_edges > 0).astype(np.int32)
+            cumsum = np.zeros((hits.shape[0] + 1, hits.shape[1]), dtype=np.int32)
+            np.cumsum(hits, axis=0, out=cumsum[1:])
+            self._edge_cumsum = cumsum
+
+        r1, r2 = y1 - band_y1, y2 - band_y1
+        return (self._edge_cumsum[r2] - self._edge_cumsum[r1])[x1:x2]
@@ -0,0 +1,166 @@
+"""
+Ingest Pipeline - decode each catalog image exactly once and fan the
+decoded array out to pluggable extractors.
+
+An extractor has two hooks:
+    prepare(img, path)  runs in the decode thread pool on the BGR array,
+                        returns a small per-image payload (a resized
+                        tensor, a colour label, a histogram...)
+    finalize(payloads)  runs on the main thread once per batch and turns
+                        the payloads into one dict of outfit fields each
+
+Per-image extractors only need prepare(); the default finalize() passes
+the payload dicts through. Batched extractors (the MobileNet embedding)
+do the heavy work in finalize() on the whole batch. The decoded image is
+dropped as soon as every prepare() has run, so memory is bounded by the
+prefetch depth, not the catalog size.
+
+run_sharded() spreads chunks of work over a process pool (one model per
+process) and yields results as they complete, so callers can stream them
+to the database and checkpoint as they go. ThroughputMeter tracks
+images/second per worker process.
+"""
+
+import multiprocessing
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+
+import cv2
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class Extractor(ABC):
+    name = "extractor"
+
+    @abstractmethod
+    def prepare(self, img, path: str):
+        ...
+
+    def finalize(self, payloads: List) -> List[dict]:
+        return payloads
+
+
+def prefetch_map(fn: Callable, items: Iterable, workers: int = DEFAULT_WORKERS, depth: int = 64):
+    """
+    Ordered, bounded-lookahead parallel map: yields (item, fn(item)) while
+    keeping at most `depth` calls in flight, so memory stays flat no
+    matter how large the catalog is.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= depth:
+                head, fut = pending.popleft()
+                yield head, fut.result()
+        while pending:
+            head, fut = pending.popleft()
+            yield head, fut.result()
+
+
+def _decode_and_prepare(extractors: List[Extractor]):
+    def work(path: str) -> Optional[list]:
+        img = cv2.imread(path)
+        if img is None:
+            return None
+        try:
+            return [ex.prepare(img, path) for ex in extractors]
+        except Exception as e:
+            print(f"   ⚠️  Extraction error on {path}: {e}")
+            return None
+    return work
+
+
+def run_extractors(paths: List[str], extractors: List[Extractor],
+                   batch_size: int = 32, workers: int = DEFAULT_WORKERS) -> Dict[str, Optional[dict]]:
+    """
+    Decode every path once and run all extractors on it.
+    Returns {path: merged field dict}; unreadable files map to None.
+    """
+    results: Dict[str, Optional[dict]] = {}
+    batch_paths, batch_payloads = [], []
+
+    def flush():
+        if not batch_paths:
+            return
+        merged = [{} for _ in batch_paths]
+        for idx, ex in enumerate(extractors):
+            try:
+                fields = ex.finalize([p[idx] for p in batch_payloads])
+            except Exception as e:
+                print(f"   ⚠️  {ex.name} failed on batch: {e}")
+                fields = [{} for _ in batch_paths]
+            for doc, f in zip(merged, fields):
+                doc.update(f)
+        for path, doc in zip(batch_paths, merged):
+            results[path] = doc
+        batch_paths.clear()
+        batch_payloads.clear()
+
+    for path, payloads in prefetch_map(_decode_and_prepare(extractors), paths,
+                                       workers=workers, depth=batch_size * 2):
+        if payloads is None:
+            results[path] = None
+            continue
+        batch_paths.append(path)
+        batch_payloads.append(payloads)
+        if len(batch_paths) >= batch_size:
+            flush()
+    flush()
+    return results
+
+
+# ── Sharding ──────────────────────────────────────────────────────────────────
+def chunked(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+
+
+def run_sharded(fn: Callable, chunks: List, shards: int, *args):
+    """
+    Yield fn(chunk, *args) for every chunk, in completion order.
+    shards <= 1 runs inline; otherwise a spawn-context process pool is used
+    (fork is unsafe once TensorFlow has started its threads).
+    """
+    if shards <= 1:
+        for chunk in chunks:
+            yield fn(chunk, *args)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=shards, mp_context=ctx) as pool:
+        futures = [pool.submit(fn, chunk, *args) for chunk in chunks]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+class ThroughputMeter:
+    """Images/second per worker plus an overall rate and ETA."""
+
+    def __init__(self, total: int):
+        self.total   = total
+        self.done    = 0
+        self.started = time.perf_counter()
+        self._images = defaultdict(int)
+        self._busy   = defaultdict(float)
+
+    def record(self, worker: int, images: int, seconds: float) -> None:
+        self.done += images
+        self._images[worker] += images
+        self._busy[worker]   += seconds
+
+    def progress_line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate    = self.done / elapsed if elapsed > 0 else 0.0
+        eta     = (self.total - self.done) / rate if rate > 0 else float("inf")
+        return f"{self.done}/{self.total} images  {rate:.1f} img/s  ETA {eta:.0f}s"
+
+    def per_worker(self) -> Dict[int, float]:
+        return {
+            worker: self._images[worker] / self._busy[worker] if self._busy[worker] > 0 else 0.0
+            for worker in self._images
+        }
@@ -1,12 +1,16 @@
 import mediapipe as mp
-import cv2
 import numpy as np
 from typing import Dict, Any, Optional, Tuple
+from app.services.image_context import ImageContext
+from app.utils.metrics import stage_timer
+from app.utils.logger import get_logger
 
 # Initialize MediaPipe
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
+logger = get_logger(__name__)
+
 class BodyAnalyzer:
     def __init__(self):
         self.pose = mp_pose.Pose(
@@ -15,13 +19,14 @@ class BodyAnalyzer:
             min_detection_confidence=0.5
         )
 
-    def analyze(self, image: np.ndarray) -> Dict[str, Any]:
+    def analyze(self, image: np.ndarray, context: Optional[ImageContext] = None) -> Dict[str, Any]:
         """Analyze body measurements from image"""
         try:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            ctx = context or ImageContext(image)
             h, w, _ = image.shape
 
-            results = self.pose.process(image_rgb)
+            with stage_timer("body_analysis", "pose"):
+                results = self.pose.process(ctx.rgb)
 
             if not results.pose_landmarks:
                 return self._empty_result()
@@ -51,22 +56,29 @@ class BodyAnalyzer:
             torso_len = abs(hip_y - shoulder_y)
             leg_len   = abs(ankle_y - hip_y)
 
+            # Edge maps are built once for shoulder → hip (padded by the
+            # widest search band) and shared by the bust & waist estimators.
+            pad = max(5, int(h * 0.04))
+            ctx.set_torso_band(min(shoulder_y, hip_y) - pad, max(shoulder_y, hip_y) + pad)
+
             # ── Bust width: proxy using shoulder + outer arm geometry ──────
             # Bust sits ~25% down from shoulder to hip on the torso.
             # We estimate it as slightly wider than shoulder for females
             # (accounting for MediaPipe under-reporting shoulder extremes).
-            bust_width = self._estimate_bust_width(
-                image, shoulder_y, hip_y, w, h,
-                left_shoulder, right_shoulder, left_elbow, right_elbow
-            )
+            with stage_timer("body_analysis", "bust"):
+                bust_width = self._estimate_bust_width(
+                    ctx, shoulder_y, hip_y, w, h,
+                    left_shoulder, right_shoulder, left_elbow, right_elbow
+                )
 
             # ── Waist estimation (multi-strategy) ─────────────────────────
-            waist_width = self._estimate_waist_width_robust(
-                image, shoulder_y, hip_y, w, h,
-                left_shoulder, right_shoulder,
-                left_elbow, right_elbow,
-                shoulder_width, hip_width
-            )
+            with stage_timer("body_analysis", "waist"):
+                waist_width = self._estimate_waist_width_robust(
+                    ctx, shoulder_y, hip_y, w, h,
+                    left_shoulder, right_shoulder,
+                    left_elbow, right_elbow,
+                    shoulder_width, hip_width
+                )
 
             # ── Ratios ─────────────────────────────────────────────────────
             # Use bust as the "top" measurement — more reliable than shoulders alone
@@ -80,10 +92,10 @@ class BodyAnalyzer:
             arm_spread = abs(right_wrist.x - left_wrist.x) * w
             arm_body_ratio = arm_spread / (shoulder_width + 0.001)
 
-            print(f"   shoulder_width={shoulder_width:.1f}  bust_width={bust_width:.1f}  "
-                  f"hip_width={hip_width:.1f}  waist_width={waist_width:.1f}")
-            print(f"   S/H={shoulder_hip_ratio:.3f}  W/H={waist_hip_ratio:.3f}  "
-                  f"B/W={bust_waist_ratio:.3f}  L/T={leg_torso_ratio:.3f}")
+            logger.debug("shoulder_width=%.1f  bust_width=%.1f  hip_width=%.1f  waist_width=%.1f",
+                         shoulder_width, bust_width, hip_width, waist_width)
+            logger.debug("S/H=%.3f  W/H=%.3f  B/W=%.3f  L/T=%.3f",
+                         shoulder_hip_ratio, waist_hip_ratio, bust_waist_ratio, leg_torso_ratio)
 
             body_type, confidence = self._classify_body_type(
                 shoulder_hip_ratio, waist_hip_ratio, bust_waist_ratio
@@ -106,9 +118,7 @@ class BodyAnalyzer:
             }
 
         except Exception as e:
-            print(f"Body analysis error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Body analysis error: %s", e)
             return self._empty_result()
 
     def _empty_result(self) -> Dict[str, Any]:
@@ -127,7 +137,7 @@ class BodyAnalyzer:
         }
 
     def _estimate_bust_width(
-        self, image, shoulder_y, hip_y, w, h,
+        self, ctx, shoulder_y, hip_y, w, h,
         left_shoulder, right_shoulder,
         left_elbow, right_elbow
     ) -> float:
@@ -153,11 +163,10 @@ class BodyAnalyzer:
             x_left  = max(0, min(ls_x, rs_x) - margin)
             x_right = min(w, max(ls_x, rs_x) + margin)
 
-            roi = image[y1:y2, x_left:x_right]
-            if roi.size == 0:
+            if y2 <= y1 or x_right <= x_left:
                 raise ValueError("Empty ROI")
 
-            bust_px = self._edge_width(roi)
+            bust_px = self._edge_width(ctx, y1, y2, x_left, x_right)
             if bust_px is None:
                 raise ValueError("Edge detection failed")
 
@@ -168,12 +177,12 @@ class BodyAnalyzer:
             return float(bust_px)
 
         except Exception as ex:
-            print(f"   Bust fallback ({ex}): shoulder*1.05")
+            logger.debug("Bust fallback (%s): shoulder*1.05", ex)
             shoulder_width = abs(right_shoulder.x - left_shoulder.x) * w
             return shoulder_width * 1.05
 
     def _estimate_waist_width_robust(
-        self, image, shoulder_y, hip_y, w, h,
+        self, ctx, shoulder_y, hip_y, w, h,
         left_shoulder, right_shoulder,
         left_elbow, right_elbow,
         shoulder_width, hip_width
@@ -204,12 +213,12 @@ class BodyAnalyzer:
             # Sanity: waist 65%–100% of shoulder width, 70%–105% of hip width
             if (shoulder_width * 0.65 <= waist_from_elbows <= shoulder_width * 1.00 and
                     hip_width * 0.70 <= waist_from_elbows <= hip_width * 1.05):
-                print(f"   Waist via elbow-gap: {waist_from_elbows:.1f}")
+                logger.debug("Waist via elbow-gap: %.1f", waist_from_elbows)
                 return float(waist_from_elbows)
             else:
                 raise ValueError(f"Elbow waist {waist_from_elbows:.1f} out of bounds")
         except Exception as ex:
-            print(f"   Elbow strategy failed: {ex}")
+            logger.debug("Elbow strategy failed: %s", ex)
 
         # ── Strategy 2: Edge detection at waist zone ──────────────────────
         try:
@@ -226,41 +235,36 @@ class BodyAnalyzer:
                 x_left  = max(0, min(ls_x, rs_x) - margin)
                 x_right = min(w, max(ls_x, rs_x) + margin)
 
-                roi = image[y1:y2, x_left:x_right]
-                if roi.size == 0:
+                if y2 <= y1 or x_right <= x_left:
                     continue
 
-                waist_px = self._edge_width(roi)
+                waist_px = self._edge_width(ctx, y1, y2, x_left, x_right)
                 if waist_px is None:
                     continue
 
                 # Relaxed sanity: 60%–100% of shoulder width
                 if shoulder_width * 0.60 <= waist_px <= shoulder_width * 1.00:
-                    print(f"   Waist via edge detection (frac={frac}): {waist_px:.1f}")
+                    logger.debug("Waist via edge detection (frac=%s): %.1f", frac, waist_px)
                     return float(waist_px)
 
             raise ValueError("Edge detection: no valid result at any fraction")
         except Exception as ex:
-            print(f"   Edge strategy failed: {ex}")
+            logger.debug("Edge strategy failed: %s", ex)
 
         # ── Strategy 3: Hip-based geometric interpolation ─────────────────
         # WHR of 0.80 is a reasonable average; avoids the old shoulder*0.82 bug
         # which was shoulder-anchored and caused Apple misclassification
         waist_fallback = hip_width * 0.80
-        print(f"   Waist via hip interpolation fallback: {waist_fallback:.1f}")
+        logger.debug("Waist via hip interpolation fallback: %.1f", waist_fallback)
         return float(waist_fallback)
 
-    def _edge_width(self, roi: np.ndarray) -> Optional[float]:
+    def _edge_width(self, ctx: ImageContext, y1: int, y2: int, x1: int, x2: int) -> Optional[float]:
         """
-        Run Canny edge detection on roi and return the 10–90th percentile
-        column span. Returns None if fewer than 5 edge columns found.
+        Look up the shared torso Canny map for rows [y1, y2) / columns
+        [x1, x2) and return the 10–90th percentile column span.
+        Returns None if fewer than 5 edge columns found.
         """
-        gray  = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        blur  = cv2.GaussianBlur(gray, (5, 5), 0)
-        # Try adaptive threshold — better for solid/low-contrast garments
-        edges = cv2.Canny(blur, 20, 80)
-
-        cols_with_edges = np.where(edges.sum(axis=0) > 0)[0]
+        cols_with_edges = np.where(ctx.edge_column_counts(y1, y2, x1, x2) > 0)[0]
         if len(cols_with_edges) < 5:
             return None
 
@@ -317,7 +321,7 @@ class BodyAnalyzer:
           preventing false hourglass from slightly low W/H alone.
         """
 
-        print(f"   Classifying: s_h={s_h:.3f}  w_h={w_h:.3f}  b_w={b_w:.3f}")
+        logger.debug("Classifying: s_h=%.3f  w_h=%.3f  b_w=%.3f", s_h, w_h, b_w)
 
         # 1. PEAR — hips clearly wider than bust/shoulders
         if s_h < 0.92:
@@ -362,13 +366,12 @@ class BodyAnalyzer:
 analyzer = BodyAnalyzer()
 
 
-def analyze_body_measurements(image: np.ndarray) -> Dict[str, Any]:
-    result = analyzer.analyze(image)
-    print(f"✅ Body Analysis Complete:")
-    print(f"   Body Type:       {result['body_type']} ({result['body_type_confidence']})")
-    print(f"   Height Category: {result['height_category']}")
-    print(f"   S/H Ratio:       {result['features']['shoulder_hip_ratio']}")
-    print(f"   W/H Ratio:       {result['features']['waist_hip_ratio']}")
-    print(f"   B/W Ratio:       {result['features']['bust_waist_ratio']}")
-    print(f"   Leg/Torso:       {result['features']['leg_torso_ratio']}")
+def analyze_body_measurements(image: np.ndarray, context: Optional[ImageContext] = None) -> Dict[str, Any]:
+    result = analyzer.analyze(image, context=context)
+    logger.info("Body analysis complete", extra={"fields": {
+        "body_type":  result["body_type"],
+        "confidence": result["body_type_confidence"],
+        "height":     result["height_category"],
+        **result["features"],
+    }})
     return result
\ No newline at end of file
@@ -8,14 +8,55 @@ FIX NOTES:
   dress/skirt/pants/shorts/hat/shoes → "sleeveless" (no arm coverage)
 - OCCASION_MAP: outwear → "casual" (was already correct)
 - Re-run this script after fixing to re-populate MongoDB with correct sleeve values.
+
+PERFORMANCE NOTES:
+- Every image is decoded exactly once by a prefetching thread pool (cv2
+  releases the GIL) and the array is fanned out to pluggable extractors
+  (app/services/ingest_pipeline.py): embedding, dominant colour, k-means
+  colour palette (app/services/color_palette.py) and multi-width WebP
+  thumbnails (app/services/thumbnail_service.py).
+  MobileNet runs on whole batches through the configured embedding
+  backend (Keras, ONNX Runtime or TFLite — EMBED_BACKEND).
+- Batch size / decode workers: --batch-size / --workers, or the
+  EMBED_BATCH_SIZE / EMBED_WORKERS environment variables.
+- --shards N splits the work across N processes. Results are streamed to
+  MongoDB chunk by chunk as they complete and the manifest is saved after
+  each write, so an interrupted run resumes where it stopped.
+- Re-indexing is incremental: a manifest (app/services/catalog_manifest.py)
+  records size/mtime/sha256/model version per file, only new or changed
+  images are embedded, outfits are upserted by image_path and documents
+  for deleted files are removed. The live collection is never emptied.
+  --full re-embeds everything (still via upserts).
+- Vectors are written into a named embedding space, embeddings.<version>
+  (default: the extractor's MODEL_VERSION). Building a new version never
+  touches the live one. The engine switches over only when the version is
+  activated (blue/green, see app/services/embedding_index.py). The first
+  complete build is activated automatically; pass --activate to switch
+  as soon as a rebuild completes.
+
+Usage (from backend/):
+    python -m app.services.mobilenet_service [--full] [--shards 4] [--batch-size 64] [--workers 8]
+        [--extractor auto|mobilenet|histogram] [--embedding-version NAME] [--activate]
 """
 
+import argparse
 import os
+import time
 import numpy as np
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
 import certifi
 import cv2
+from app.services.catalog_manifest import CatalogManifest, manifest_path_for
+from app.services.catalog_snapshot import refresh_published
+from app.services.embedding_index import get_active_version, set_active_version, version_status
+from app.services.embedding_backend import load_backend
+from app.utils.embeddings import validate_version, versioned_fields
+from app.services.thumbnail_service import generate_thumbnails
+from app.services.color_palette import encode_palette, extract_palette
+from app.services.ingest_pipeline import (
+    Extractor, ThroughputMeter, chunked, run_extractors, run_sharded,
+)
 
 load_dotenv()
 
@@ -26,40 +67,75 @@ collection  = db["outfits"]
 
 BASE_FOLDER = "outfit_images"
 
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_WORKERS    = int(os.getenv("EMBED_WORKERS", str(min(8, os.cpu_count() or 1))))
+INSERT_BATCH_SIZE = 500
+INGEST_SHARDS     = int(os.getenv("INGEST_SHARDS", "1"))
+
 # ── Load MobileNet ────────────────────────────────────────────────────────────
+# EMBED_BACKEND=auto|keras|onnx|tflite (see app/services/embedding_backend.py).
+# The exported ONNX/TFLite models start in well under a second and skip
+# importing TensorFlow entirely.
 print("Loading MobileNet model...")
 try:
-    import tensorflow as tf
-    base_model = tf.keras.applications.MobileNetV2(
-        weights="imagenet",
-        include_top=False,
-        pooling="avg",
-        input_shape=(224, 224, 3)
-    )
-    base_model.trainable = False
-    print("✅ MobileNetV2 loaded")
+    embedding_backend = load_backend()
+    print(f"✅ MobileNetV2 loaded ({embedding_backend.name} backend)")
     USE_MOBILENET = True
 except Exception as e:
     print(f"⚠️  MobileNet not available: {e}")
     print("   Will use color histogram as fallback feature vector")
     USE_MOBILENET = False
 
+# Bumped whenever the extractor changes so the manifest re-embeds everything.
+# Keras / ONNX / TFLite share a version: they are held to numerical parity.
+EXTRACTOR_VERSIONS = {
+    "mobilenet": "mobilenet_v2-imagenet-avg-1280",
+    "histogram": "color_hist-hsv-96",
+}
+DEFAULT_EXTRACTOR = "mobilenet" if USE_MOBILENET else "histogram"
+MODEL_VERSION     = EXTRACTOR_VERSIONS[DEFAULT_EXTRACTOR]
+
 
 # ── Feature extraction ────────────────────────────────────────────────────────
+def preprocess_for_mobilenet(img: np.ndarray) -> np.ndarray:
+    """Resize + MobileNetV2 preprocess an already-decoded BGR image."""
+    img = cv2.resize(img, (224, 224))
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype(np.float32)
+    # Same scaling as mobilenet_v2.preprocess_input: [0, 255] → [-1, 1]
+    return img / 127.5 - 1.0
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_mobilenet_batch(batch: np.ndarray) -> np.ndarray:
+    """Run MobileNet on an (N, 224, 224, 3) batch; returns L2-normalised (N, 1280)."""
+    return _normalize_rows(embedding_backend.embed(batch))
+
+
+def color_histogram(img: np.ndarray) -> np.ndarray:
+    """96-dim HSV histogram (32 bins per channel), L2-normalised."""
+    img = cv2.resize(img, (100, 100))
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    h_hist = cv2.calcHist([hsv], [0], None, [32], [0, 180]).flatten()
+    s_hist = cv2.calcHist([hsv], [1], None, [32], [0, 256]).flatten()
+    v_hist = cv2.calcHist([hsv], [2], None, [32], [0, 256]).flatten()
+    features = np.concatenate([h_hist, s_hist, v_hist])
+    norm = np.linalg.norm(features)
+    if norm > 0:
+        features = features / norm
+    return features
+
+
 def extract_mobilenet_features(image_path: str) -> list:
     try:
         img = cv2.imread(image_path)
         if img is None:
             return []
-        img = cv2.resize(img, (224, 224))
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = tf.keras.applications.mobilenet_v2.preprocess_input(img)
-        img = np.expand_dims(img, axis=0)
-        features = base_model.predict(img, verbose=0).flatten()
-        norm = np.linalg.norm(features)
-        if norm > 0:
-            features = features / norm
-        return features.tolist()
+        return embed_mobilenet_batch(preprocess_for_mobilenet(img)[np.newaxis])[0].tolist()
     except Exception as e:
         print(f"   ⚠️  Feature extraction error: {e}")
         return []
@@ -70,16 +146,7 @@ def extract_color_histogram_features(image_path: str) -> list:
         img = cv2.imread(image_path)
         if img is None:
             return []
-        img = cv2.resize(img, (100, 100))
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        h_hist = cv2.calcHist([hsv], [0], None, [32], [0, 180]).flatten()
-        s_hist = cv2.calcHist([hsv], [1], None, [32], [0, 256]).flatten()
-        v_hist = cv2.calcHist([hsv], [2], None, [32], [0, 256]).flatten()
-        features = np.concatenate([h_hist, s_hist, v_hist])
-        norm = np.linalg.norm(features)
-        if norm > 0:
-            features = features / norm
-        return features.tolist()
+        return color_histogram(img).tolist()
     except Exception as e:
         print(f"   ⚠️  Histogram error: {e}")
         return []
@@ -103,39 +170,102 @@ COLOR_RANGES = [
     ("red",    171,180),
 ]
 
+def detect_color(img: np.ndarray) -> str:
+    """Coarse colour label from the mean hue of an already-decoded BGR image."""
+    img = cv2.resize(img, (100, 100))
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    s = hsv[:, :, 1]
+    v = hsv[:, :, 2]
+    mask = (s > 40) & (v > 40) & (v < 240)
+    if np.sum(mask) < 50:
+        mean_v = float(np.mean(v))
+        if mean_v > 180:   return "white"
+        elif mean_v < 60:  return "black"
+        else:              return "grey"
+    hues   = hsv[:, :, 0][mask]
+    mean_h = float(np.mean(hues))
+    mean_s = float(np.mean(s[mask]))
+    if mean_s < 30:
+        mean_v = float(np.mean(v))
+        if mean_v > 170:  return "white"
+        elif mean_v < 70: return "black"
+        return "grey"
+    if mean_s < 80 and 10 <= mean_h <= 25:
+        return "brown"
+    for color_name, hue_min, hue_max in COLOR_RANGES:
+        if hue_min <= mean_h <= hue_max:
+            return color_name
+    return "multi"
+
+
 def detect_color_from_image(image_path: str) -> str:
     try:
         img = cv2.imread(image_path)
         if img is None:
             return "multi"
-        img = cv2.resize(img, (100, 100))
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        s = hsv[:, :, 1]
-        v = hsv[:, :, 2]
-        mask = (s > 40) & (v > 40) & (v < 240)
-        if np.sum(mask) < 50:
-            mean_v = float(np.mean(v))
-            if mean_v > 180:   return "white"
-            elif mean_v < 60:  return "black"
-            else:              return "grey"
-        hues   = hsv[:, :, 0][mask]
-        mean_h = float(np.mean(hues))
-        mean_s = float(np.mean(s[mask]))
-        if mean_s < 30:
-            mean_v = float(np.mean(v))
-            if mean_v > 170:  return "white"
-            elif mean_v < 70: return "black"
-            return "grey"
-        if mean_s < 80 and 10 <= mean_h <= 25:
-            return "brown"
-        for color_name, hue_min, hue_max in COLOR_RANGES:
-            if hue_min <= mean_h <= hue_max:
-                return color_name
-        return "multi"
+        return detect_color(img)
     except:
         return "multi"
 
 
+# ── Ingest extractors (one decode, many outputs) ─────────────────────────────
+class MobileNetExtractor(Extractor):
+    name = "mobilenet"
+
+    def prepare(self, img, path):
+        return preprocess_for_mobilenet(img)
+
+    def finalize(self, payloads):
+        vectors = embed_mobilenet_batch(np.stack(payloads))
+        return [{"features": vec} for vec in vectors]
+
+
+class HistogramExtractor(Extractor):
+    name = "histogram"
+
+    def prepare(self, img, path):
+        return {"features": color_histogram(img)}
+
+
+class DominantColorExtractor(Extractor):
+    name = "color"
+
+    def prepare(self, img, path):
+        try:
+            return {"color": detect_color(img)}
+        except Exception:
+            return {"color": "multi"}
+
+
+class PaletteExtractor(Extractor):
+    name = "palette"
+
+    def prepare(self, img, path):
+        try:
+            return encode_palette(extract_palette(img))
+        except Exception:
+            return {}
+
+
+class ThumbnailExtractor(Extractor):
+    name = "thumbnail"
+
+    def prepare(self, img, path):
+        image_path = os.path.relpath(path, BASE_FOLDER).replace(os.sep, "/")
+        try:
+            return {"thumbnail_widths": generate_thumbnails(img, image_path)}
+        except Exception as e:
+            print(f"   ⚠️  Thumbnail error on {image_path}: {e}")
+            return {"thumbnail_widths": []}
+
+
+def default_extractors(extractor: str = DEFAULT_EXTRACTOR) -> list:
+    if extractor == "mobilenet" and not USE_MOBILENET:
+        raise RuntimeError("MobileNet extractor requested but no embedding backend is available")
+    embedding = MobileNetExtractor() if extractor == "mobilenet" else HistogramExtractor()
+    return [embedding, DominantColorExtractor(), PaletteExtractor(), ThumbnailExtractor()]
+
+
 # ── FIXED: Category → sleeve / occasion ──────────────────────────────────────
 #
 # SLEEVE_MAP rules:
@@ -174,71 +304,196 @@ OCCASION_MAP = {
 
 
 # ── Main processing ───────────────────────────────────────────────────────────
-def process_images():
-    outfits = []
-
+def list_catalog_images(base_folder: str = BASE_FOLDER) -> list:
+    """Return [(category, file_name), ...] for every image under base_folder."""
+    entries = []
     categories = [
-        d for d in os.listdir(BASE_FOLDER)
-        if os.path.isdir(os.path.join(BASE_FOLDER, d))
+        d for d in sorted(os.listdir(base_folder))
+        if os.path.isdir(os.path.join(base_folder, d))
     ]
     print(f"\n📂 Categories found: {categories}\n")
 
     for category in categories:
-        cat_path = os.path.join(BASE_FOLDER, category)
+        cat_path = os.path.join(base_folder, category)
         files    = [
-            f for f in os.listdir(cat_path)
+            f for f in sorted(os.listdir(cat_path))
             if f.lower().endswith((".jpg", ".jpeg", ".png"))
         ]
         print(f"📁 {category}: {len(files)} images")
+        entries.extend((category, f) for f in files)
+    return entries
+
+
+def build_outfit_doc(category: str, file: str, extracted: dict, version: str = MODEL_VERSION) -> dict:
+    # Use SLEEVE_MAP with fallback to "short" for any unknown top categories
+    cat_lower = category.lower().strip()
+    extracted = dict(extracted or {})
+    features  = extracted.pop("features", [])
+    return {
+        "name":       file.split(".")[0],
+        "category":   cat_lower,
+        "image_path": f"{category}/{file}",
+        "sleeves":    SLEEVE_MAP.get(cat_lower, "short"),
+        "occasion":   OCCASION_MAP.get(cat_lower, "casual"),
+        **extracted,
+        "color":      extracted.get("color", "multi"),
+        # Packed float32 blob in the embeddings.<version> space, see app/utils/embeddings.py
+        **versioned_fields(features, version),
+    }
+
+
+def extract_chunk(chunk: list, batch_size: int, workers: int,
+                  extractor: str = DEFAULT_EXTRACTOR, version: str = MODEL_VERSION):
+    """
+    Worker entry point: extract one chunk of (image_path key, file path)
+    pairs. Returns (worker pid, outfit docs, seconds spent).
+    """
+    started   = time.perf_counter()
+    extracted = run_extractors([path for _, path in chunk], default_extractors(extractor),
+                               batch_size=batch_size, workers=workers)
+    docs = []
+    for key, path in chunk:
+        category, file = key.split("/", 1)
+        docs.append(build_outfit_doc(category, file, extracted.get(path), version))
+    return os.getpid(), docs, time.perf_counter() - started
+
+
+def write_outfits(outfits: list) -> None:
+    collection.bulk_write(
+        [UpdateOne({"image_path": o["image_path"]},
+                   {"$set": o, "$unset": {"features": ""}},   # drop legacy float arrays
+                   upsert=True)
+         for o in outfits],
+        ordered=False,
+    )
 
-        for i, file in enumerate(files):
-            image_path = os.path.join(cat_path, file)
-            print(f"   [{i+1}/{len(files)}] {file[:40]}", end=" ... ")
-
-            features = extract_features(image_path)
-            color    = detect_color_from_image(image_path)
-
-            # Use SLEEVE_MAP with fallback to "short" for any unknown top categories
-            cat_lower = category.lower().strip()
-            sleeves  = SLEEVE_MAP.get(cat_lower, "short")
-            occasion = OCCASION_MAP.get(cat_lower, "casual")
-
-            print(f"color={color}, sleeves={sleeves}, features={len(features)} dims")
-
-            outfits.append({
-                "name":       file.split(".")[0],
-                "category":   cat_lower,
-                "image_path": f"{category}/{file}",
-                "color":      color,
-                "sleeves":    sleeves,
-                "occasion":   occasion,
-                "features":   features,
-            })
 
-    print(f"\n📊 Total: {len(outfits)} outfits processed")
+def process_images(batch_size: int = EMBED_BATCH_SIZE, workers: int = EMBED_WORKERS,
+                   full: bool = False, shards: int = INGEST_SHARDS,
+                   extractor: str = DEFAULT_EXTRACTOR, version: str = None,
+                   activate: bool = False):
+    model_version = EXTRACTOR_VERSIONS[extractor]
+    version       = validate_version(version or model_version)
+    entries = list_catalog_images()
+    files   = {f"{category}/{file}": os.path.join(BASE_FOLDER, category, file)
+               for category, file in entries}
+
+    print(f"🧬 Embedding space: {version} (extractor={extractor})")
+    manifest = CatalogManifest(manifest_path_for(version))
+    if full:
+        manifest.entries = {}
+    changed, unchanged, removed = manifest.diff(files, model_version)
+
+    # Catalogs ingested before palettes existed: re-extract those images too,
+    # so /recommend/by-color works without a --full run
+    if unchanged:
+        missing = set(collection.distinct("image_path", {"palette": {"$exists": False}}))
+        backfill = [key for key in unchanged if key in missing]
+        if backfill:
+            print(f"🎨 {len(backfill)} unchanged images have no colour palette — re-extracting")
+            changed   = changed + backfill
+            unchanged = [key for key in unchanged if key not in missing]
+
+    # Documents whose file vanished, including ones the manifest never saw
+    live_paths = set(collection.distinct("image_path"))
+    removed    = sorted(set(removed) | (live_paths - set(files)))
+
+    print(f"\n📊 {len(changed)} new/changed, {len(unchanged)} unchanged, {len(removed)} removed")
 
-    if not outfits:
-        print("⚠️  No outfits found!")
+    from collections import Counter
+    stats = {field: Counter() for field in ("color", "occasion", "category", "sleeves")}
+    feature_dim = 0
+
+    if changed:
+        shards     = max(1, shards)
+        threads    = max(1, workers // shards)
+        chunk_size = min(INSERT_BATCH_SIZE, max(batch_size, len(changed) // (shards * 4) or 1))
+        chunks     = chunked([(key, files[key]) for key in changed], chunk_size)
+        meter      = ThroughputMeter(len(changed))
+
+        print(f"\n🧠 Extracting {len(changed)} images in {len(chunks)} chunks "
+              f"(shards={shards}, batch={batch_size}, threads/shard={threads})...")
+
+        for pid, docs, seconds in run_sharded(extract_chunk, chunks, shards, batch_size, threads,
+                                              extractor, version):
+            # Stream to MongoDB, then checkpoint: a re-run skips everything written so far.
+            # Images that failed to decode or embed (dim 0) stay out of the manifest
+            # so the next incremental run retries them.
+            write_outfits(docs)
+            embedded = [o["image_path"] for o in docs if o[f"embeddings.{version}"]["embedding_dim"] > 0]
+            manifest.mark_done(embedded)
+            manifest.save()
+            if len(embedded) < len(docs):
+                print(f"   ⚠️  {len(docs) - len(embedded)} images without a vector — will retry next run")
+
+            meter.record(pid, len(docs), seconds)
+            for o in docs:
+                for field, counter in stats.items():
+                    counter[o[field]] += 1
+                feature_dim = feature_dim or o[f"embeddings.{version}"]["embedding_dim"]
+            print(f"   ✅ {meter.progress_line()}")
+
+        for pid, rate in sorted(meter.per_worker().items()):
+            print(f"   ⚙️  worker {pid}: {rate:.1f} img/s")
+
+    if removed:
+        print(f"🗑️  Removing {len(removed)} outfits whose images are gone...")
+        collection.delete_many({"image_path": {"$in": removed}})
+        manifest.forget(removed)
+
+    manifest.save()
+
+    # Blue/green: only a complete space is ever made live
+    active = get_active_version(db, use_cache=False)
+    switched = False
+    if version != active and (activate or active is None):
+        if version_status(db, version)["complete"]:
+            set_active_version(db, version, refresh_snapshot=False)
+            switched = True
+            print(f"🔀 Active embedding version → {version} (previous: {active})")
+        else:
+            print(f"⚠️  {version} is incomplete; engine stays on {active}")
+
+    # Republish the shared catalog snapshot if one is in use (app/services/catalog_snapshot.py)
+    if changed or removed or switched:
+        if refresh_published() is not None:
+            print("📦 Catalog snapshot rebuilt")
+
+    if not changed:
+        print("\n✅ Catalog already up to date")
         return
 
-    print("\n🗑️  Clearing old MongoDB data...")
-    collection.delete_many({})
-
-    print("💾 Inserting into MongoDB in batches...")
-    batch_size = 50
-    for i in range(0, len(outfits), batch_size):
-        batch = outfits[i:i + batch_size]
-        collection.insert_many(batch)
-        print(f"   ✅ Batch {i // batch_size + 1}: {len(batch)} outfits")
-
-    from collections import Counter
-    print(f"\n✅ Done! {len(outfits)} outfits inserted with feature vectors")
-    print(f"   Colors:     {dict(Counter(o['color']    for o in outfits))}")
-    print(f"   Occasions:  {dict(Counter(o['occasion'] for o in outfits))}")
-    print(f"   Categories: {dict(Counter(o['category'] for o in outfits))}")
-    print(f"   Sleeves:    {dict(Counter(o['sleeves']  for o in outfits))}")
-    print(f"   Feature dim: {len(outfits[0]['features'])} per outfit")
+    print(f"\n✅ Done! {len(changed)} outfits upserted with feature vectors")
+    print(f"   Colors:     {dict(stats['color'])}")
+    print(f"   Occasions:  {dict(stats['occasion'])}")
+    print(f"   Categories: {dict(stats['category'])}")
+    print(f"   Sleeves:    {dict(stats['sleeves'])}")
+    print(f"   Feature dim: {feature_dim} per outfit")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Embed the outfit catalog into MongoDB")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help="images per MobileNet forward pass (default %(default)s)")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS,
+                        help="decode/preprocess threads (default %(default)s)")
+    parser.add_argument("--shards", type=int, default=INGEST_SHARDS,
+                        help="worker processes, one model each (default %(default)s)")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and re-embed every image")
+    parser.add_argument("--extractor", choices=["auto", "mobilenet", "histogram"], default="auto",
+                        help="embedding extractor (auto: MobileNet if available)")
+    parser.add_argument("--embedding-version", default=None,
+                        help="name of the embedding space to build (default: extractor version)")
+    parser.add_argument("--activate", action="store_true",
+                        help="make this version live once it is complete")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    process_images()
\ No newline at end of file
+    args = _parse_args()
+    collection.create_index("image_path")
+    process_images(batch_size=args.batch_size, workers=args.workers,
+                   full=args.full, shards=args.shards,
+                   extractor=DEFAULT_EXTRACTOR if args.extractor == "auto" else args.extractor,
+                   version=args.embedding_version, activate=args.activate)
@@ -1,37 +1,162 @@
-"""Outfit Processor Service"""
-from app.utils.db import db
-from typing import List, Dict, Any
+"""
+Outfit Processor Service
+
+Catalog reads, including a streaming NDJSON export that runs in constant
+memory: documents are pulled from a server-side cursor `batch_size` at a
+time and emitted as newline-delimited JSON chunks.
+
+    python -m app.services.outfit_processor export --fields name,category,vector > catalog.ndjson
+    GET /catalog/export?fields=name,category,color&batch_size=1000
+
+The Mongo client is imported on first use, not at import time, so
+importing this module (the API does, for /catalog/export) never blocks
+on server selection or index builds.
+"""
+import argparse
+import base64
+import json
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Sequence
+from app.utils.embeddings import decode_embedding, embedding_projection
+from app.services.embedding_index import get_active_version
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Default export columns: what downstream systems need to render / filter
+EXPORT_FIELDS = ("name", "category", "color", "sleeves", "occasion", "image_path", "image_blob")
+
+# Pseudo-field: the active embedding decoded to a list of floats
+VECTOR_FIELD = "vector"
+
+EXPORT_BATCH_SIZE = 1000
+MAX_EXPORT_BATCH_SIZE = 10000
+
+
+def _db():
+    from app.utils.db import db
+    return db
+
 
 def get_outfits_count() -> int:
     """Get count of outfits in database"""
     try:
-        outfits_collection = db["outfits"]
+        outfits_collection = _db()["outfits"]
         count = outfits_collection.count_documents({})
-        print(f"✅ Outfit count: {count}")
+        logger.debug("Outfit count: %d", count)
         return count
     except Exception as e:
-        print(f"❌ Error getting outfit count: {str(e)}")
+        logger.error("Error getting outfit count: %s", e)
         return 0
 
 def get_all_outfits() -> List[Dict[str, Any]]:
-    """Get all outfits from database"""
+    """
+    Get all outfits from database. Materialises the whole catalog — prefer
+    iter_outfits() / export_ndjson() for anything catalog-sized.
+    """
     try:
-        outfits_collection = db["outfits"]
-        outfits = list(outfits_collection.find({}, {"_id": 0}))
-        print(f"✅ Retrieved {len(outfits)} outfits")
+        outfits = list(iter_outfits(fields=None))
+        logger.debug("Retrieved %d outfits", len(outfits))
         return outfits
     except Exception as e:
-        print(f"❌ Error getting outfits: {str(e)}")
+        logger.error("Error getting outfits: %s", e)
         return []
 
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):          # bson Binary is a bytes subclass
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)                                 # ObjectId and friends
+
+
+def iter_outfits(fields: Optional[Sequence[str]] = EXPORT_FIELDS,
+                 batch_size: int = EXPORT_BATCH_SIZE,
+                 query: Optional[dict] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield outfit documents one at a time from a server-side cursor.
+    fields=None exports every stored field (except legacy base64 images);
+    the "vector" pseudo-field adds the active embedding as a float list.
+    """
+    fields  = list(fields) if fields else None
+    version = None
+    if fields is None:
+        # Never drag legacy base64 image payloads across the wire
+        projection = {"_id": 0, "image": 0}
+    else:
+        projection = {"_id": 0, **{f: 1 for f in fields if f != VECTOR_FIELD}}
+        if VECTOR_FIELD in fields:
+            version = get_active_version(_db())
+            projection.update(embedding_projection(version))
+
+    cursor = _db()["outfits"].find(query or {}, projection).batch_size(batch_size)
+    try:
+        for doc in cursor:
+            if fields is not None and VECTOR_FIELD in fields:
+                vector = decode_embedding(doc, version)
+                for key in embedding_projection(version):
+                    doc.pop(key.split(".")[0], None)
+                doc[VECTOR_FIELD] = None if vector is None else vector.tolist()
+            yield doc
+    finally:
+        cursor.close()
+
+
+def export_ndjson(fields: Optional[Sequence[str]] = EXPORT_FIELDS,
+                  batch_size: int = EXPORT_BATCH_SIZE,
+                  query: Optional[dict] = None) -> Iterator[bytes]:
+    """
+    NDJSON export in chunks of `batch_size` lines; binary fields are base64.
+    The status line is long gone by the time a cursor can fail mid-stream,
+    so a failure ends the stream with an {"error": ...} line instead of
+    silently truncating it.
+    """
+    batch_size = max(1, min(batch_size, MAX_EXPORT_BATCH_SIZE))
+    lines = []
+    try:
+        for doc in iter_outfits(fields, batch_size, query):
+            lines.append(json.dumps(doc, default=_json_default, separators=(",", ":")))
+            if len(lines) >= batch_size:
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+    except Exception as e:
+        logger.exception("Catalog export failed: %s", e)
+        lines.append(json.dumps({"error": f"export aborted: {e}"}))
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
 def get_outfit_by_name(name: str) -> Dict[str, Any]:
     """Get specific outfit by name"""
     try:
-        outfits_collection = db["outfits"]
-        outfit = outfits_collection.find_one({"name": name}, {"_id": 0})
+        outfits_collection = _db()["outfits"]
+        outfit = outfits_collection.find_one({"name": name}, {"_id": 0, "image": 0})
         if outfit:
-            print(f"✅ Found outfit: {name}")
+            logger.debug("Found outfit: %s", name)
         return outfit
     except Exception as e:
-        print(f"❌ Error getting outfit: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Error getting outfit: %s", e)
+        return None
+
+def parse_fields(raw: Optional[str]) -> Optional[List[str]]:
+    """"a,b,c" → ["a", "b", "c"]; "*" → None (all fields); empty → defaults."""
+    if not raw:
+        return list(EXPORT_FIELDS)
+    if raw.strip() == "*":
+        return None
+    return [f.strip() for f in raw.split(",") if f.strip() and not f.strip().startswith("$")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outfit catalog tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="stream the catalog as NDJSON to stdout")
+    exp.add_argument("--fields", default=None,
+                     help=f"comma-separated fields, '*' for all (default: {','.join(EXPORT_FIELDS)})")
+    exp.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    for chunk in export_ndjson(parse_fields(args.fields), args.batch_size):
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.flush()
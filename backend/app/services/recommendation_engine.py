@@ -16,9 +16,21 @@ from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 import certifi
+from app.utils.metrics import stage_timer
+from app.utils.embeddings import (
+    FOLD_STRIDE, decode_embedding, decode_folded, embedding_projection, fold_vector, folded_projection,
+)
+from app.services.embedding_index import get_active_version
+from app.services.repositories import STORAGE_BACKEND
+from app.services.storage_sqlite import get_store
+from app.services.catalog_snapshot import current_snapshot
+from app.services.thumbnail_service import original_url, thumbnail_url
+from app.utils.logger import get_logger
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 MONGO_URI  = os.getenv("MONGO_URL")
 collection = None
 
@@ -26,9 +38,9 @@ try:
     client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000, tlsCAFile=certifi.where())
     db         = client["ai_fashion"]
     collection = db["outfits"]
-    print("✅ MongoDB Connected in recommendation_engine")
+    logger.info("MongoDB connected in recommendation_engine")
 except Exception as e:
-    print(f"❌ MongoDB Error: {str(e)}")
+    logger.error("MongoDB error: %s", e)
 
 
 # ── Fashion rules (used for SCORING BONUS only, NOT hard DB filters) ──────────
@@ -80,34 +92,125 @@ HEIGHT_ENCODING = {
 }
 
 
-def build_user_vector(body_type: str, skin_tone: str, height_category: str = "Average") -> np.ndarray:
-    """
-    Build user feature vector: body_type (5) + skin_tone (5) + height (3) = 13 dims
-    Tiled to 1300 dims then trimmed to 1280 to match MobileNet output.
-    Normalised to unit vector for cosine similarity.
-    """
+def build_user_profile(body_type: str, skin_tone: str, height_category: str = "Average") -> np.ndarray:
+    """User profile: body_type (5) + skin_tone (5) + height (3) = 13 dims"""
     body_enc   = BODY_TYPE_ENCODING.get(body_type or "Unknown",       [0] * 5)
     skin_enc   = SKIN_TONE_ENCODING.get(skin_tone or "Unknown",       [0] * 5)
     height_enc = HEIGHT_ENCODING.get(height_category or "Average", [0, 1, 0])
+    return np.array(body_enc + skin_enc + height_enc, dtype=np.float32)
 
-    base_vector = np.array(body_enc + skin_enc + height_enc, dtype=np.float32)  # 13 dims
 
-    reps        = int(np.ceil(1280 / len(base_vector)))
-    user_vector = np.tile(base_vector, reps)[:1280]
+def folded_cosine(profile: np.ndarray, folded: np.ndarray, norms: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    """
+    Cosine between the profile tiled to each outfit's length and the outfit
+    vectors, from their folded (N, 13) projections alone.
 
-    norm = np.linalg.norm(user_vector)
-    if norm > 0:
-        user_vector = user_vector / norm
+    For a vector of length D the tiled profile repeats entry j
+    D // 13 + (j < D % 13) times, which gives its norm; the dot product is
+    folded · profile. The result equals the cosine between the full vector
+    and the profile tiled out to D entries.
+    """
+    repeats   = dims[:, None] // FOLD_STRIDE + (np.arange(FOLD_STRIDE) < (dims % FOLD_STRIDE)[:, None])
+    user_norm = np.sqrt(repeats @ (profile ** 2))
+    denom     = user_norm * norms
+    dots      = folded @ profile
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
 
-    return user_vector
 
+def fetch_catalog(fetch_limit: int) -> tuple:
+    """
+    Scoring rows from the configured storage backend:
+    (outfits, embedding_version, fetch_vectors), where fetch_vectors(ids)
+    returns full-vector documents for rows that lack folded fields.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        store = get_store()
+        # The active embedding version was flattened into the rows at import
+        return store.scoring_rows(fetch_limit), None, store.embedding_rows
+
+    # Blue/green embedding space (None → legacy top-level vectors)
+    embedding_version = get_active_version(db)
+    outfits = list(collection.find(
+        {},   # ← NO filter — fetch everything
+        {
+            "_id": 1, "name": 1, "category": 1, "color": 1,
+            "sleeves": 1, "occasion": 1, "image_path": 1,
+            **folded_projection(embedding_version)
+        }
+    ).limit(fetch_limit))
 
-def cosine_similarity(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
-    norm_a = np.linalg.norm(vec_a)
-    norm_b = np.linalg.norm(vec_b)
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return float(np.dot(vec_a, vec_b) / (norm_a * norm_b))
+    def fetch_vectors(ids):
+        return collection.find({"_id": {"$in": ids}}, {"_id": 1, **embedding_projection(embedding_version)})
+
+    return outfits, embedding_version, fetch_vectors
+
+
+def live_snapshot():
+    """
+    The published catalog snapshot, but only if it was built from this
+    storage backend and the embedding version catalog_meta names now. After
+    an activate / rollback a stale snapshot is ignored, and the engine
+    queries storage until catalog_snapshot.refresh_published() replaces it.
+    """
+    snapshot = current_snapshot()
+    if snapshot is None or snapshot.storage != STORAGE_BACKEND:
+        return None
+    if STORAGE_BACKEND == "sqlite":
+        # The active version was flattened into the store at import
+        return snapshot
+    if collection is None:
+        return None
+    active = get_active_version(db)
+    if snapshot.embedding_version != active:
+        logger.debug("Ignoring snapshot %s: built for embedding version %s, active is %s",
+                     snapshot.version, snapshot.embedding_version, active)
+        return None
+    return snapshot
+
+
+def catalog_version() -> str:
+    """
+    Identifies the catalog get_recommendations would score against right
+    now: the live snapshot if any, else the active embedding space.
+    Response caches key on it so a republish or version switch misses.
+    """
+    snapshot = live_snapshot()
+    if snapshot is not None:
+        return f"snapshot:{snapshot.version}"
+    if STORAGE_BACKEND == "sqlite":
+        return "sqlite"
+    if collection is None:
+        return "offline"
+    return f"embeddings:{get_active_version(db) or 'legacy'}"
+
+
+def load_folded(outfits: list, embedding_version, fetch_vectors) -> tuple:
+    """
+    Stack the folded projections of fetched outfits: (folded, norms, dims,
+    has_vector). Outfits written before folded fields existed are folded
+    here from their full vectors, fetched in a single fetch_vectors() call.
+    """
+    n       = len(outfits)
+    folded  = np.zeros((n, FOLD_STRIDE), dtype=np.float32)
+    norms   = np.zeros(n, dtype=np.float32)
+    dims    = np.zeros(n, dtype=np.int64)
+    missing = {}
+
+    for i, outfit in enumerate(outfits):
+        entry = decode_folded(outfit, embedding_version)
+        if entry is None:
+            missing[outfit["_id"]] = i
+            continue
+        folded[i], norms[i], dims[i] = entry
+
+    if missing:
+        for doc in fetch_vectors(list(missing)):
+            vector = decode_embedding(doc, embedding_version)
+            if vector is not None and len(vector) > 0:
+                i = missing[doc["_id"]]
+                folded[i], norms[i], dims[i] = fold_vector(vector), np.linalg.norm(vector), len(vector)
+
+    return folded, norms, dims, dims > 0
 
 
 def get_recommendations(
@@ -137,38 +240,38 @@ def get_recommendations(
       ✅ Recommendations still rank body/skin-appropriate items higher
     """
     try:
-        if collection is None:
+        # Shared memory-mapped catalog, if one is published and current (catalog_snapshot.py)
+        snapshot = live_snapshot()
+
+        if snapshot is None and collection is None and STORAGE_BACKEND != "sqlite":
             return {"success": False, "error": "Database not connected"}
 
-        print(f"\n🔍 Recs for body={body_type}, skin={skin_tone}, height={height_category}")
+        logger.debug("Recs for body=%s, skin=%s, height=%s", body_type, skin_tone, height_category)
 
-        # ── Build user vector ──────────────────────────────────────────────
-        user_vector = build_user_vector(body_type, skin_tone, height_category)
-        print(f"   User vector: {len(user_vector)} dims")
+        # ── Build user profile (scored against folded outfit vectors) ─────
+        user_profile = build_user_profile(body_type, skin_tone, height_category)
 
         # ── Bonus category sets (for scoring only) ─────────────────────────
         recommended_cats   = BODY_TYPE_CATEGORIES.get(body_type or "Unknown", [])
         recommended_colors = SKIN_TONE_COLORS.get(skin_tone or "Unknown", []) or []
         height_boost_cats  = HEIGHT_CATEGORY_BOOST.get(height_category or "Average") or []
 
-        print(f"   Body bonus cats:  {recommended_cats}")
-        print(f"   Skin bonus colors: {recommended_colors}")
-        print(f"   Height boost:     {height_boost_cats}")
+        logger.debug("Body bonus cats: %s  skin bonus colors: %s  height boost: %s",
+                     recommended_cats, recommended_colors, height_boost_cats)
 
         # ── Fetch ALL outfits — no hard pre-filter ─────────────────────────
         # We need the full set so the frontend filters (color/sleeve/occasion/category)
         # always work on the complete data. top_k * 20 gives a large enough pool.
         fetch_limit = max(top_k * 20, 2000)
 
-        all_outfits = list(collection.find(
-            {},   # ← NO filter — fetch everything
-            {
-                "_id": 0, "name": 1, "category": 1, "color": 1,
-                "sleeves": 1, "occasion": 1, "image_path": 1, "features": 1
-            }
-        ).limit(fetch_limit))
+        with stage_timer("recommend", "fetch"):
+            if snapshot is not None:
+                all_outfits = snapshot.cards(fetch_limit)
+            else:
+                all_outfits, embedding_version, fetch_vectors = fetch_catalog(fetch_limit)
 
-        print(f"   Fetched {len(all_outfits)} outfits from DB (no pre-filter)")
+        logger.debug("Fetched %d outfits (%s, no pre-filter)", len(all_outfits),
+                     f"snapshot {snapshot.version}" if snapshot is not None else "storage")
 
         if not all_outfits:
             return {
@@ -181,83 +284,75 @@ def get_recommendations(
             }
 
         # ── Score every outfit ─────────────────────────────────────────────
-        recommendations = []
-        has_features    = False
-
-        for outfit in all_outfits:
-            outfit_features = outfit.get("features", [])
-            outfit_cat      = (outfit.get("category") or "").lower().strip()
-            outfit_color    = (outfit.get("color")    or "").lower().strip()
-
-            # ── Cosine similarity ──────────────────────────────────────────
-            if outfit_features and len(outfit_features) > 0:
-                outfit_vector = np.array(outfit_features, dtype=np.float32)
-
-                # Handle dimension mismatch (color-histogram fallback = 96 dims)
-                if len(outfit_vector) != len(user_vector):
-                    base = np.array(
-                        BODY_TYPE_ENCODING.get(body_type or "Unknown", [0]*5) +
-                        SKIN_TONE_ENCODING.get(skin_tone or "Unknown", [0]*5) +
-                        HEIGHT_ENCODING.get(height_category or "Average", [0,1,0]),
-                        dtype=np.float32
-                    )
-                    uv = np.tile(base, int(np.ceil(len(outfit_vector) / 13)))[:len(outfit_vector)]
-                    norm = np.linalg.norm(uv)
-                    if norm > 0:
-                        uv = uv / norm
-                    sim_score = cosine_similarity(uv, outfit_vector)
-                else:
-                    sim_score = cosine_similarity(user_vector, outfit_vector)
-
-                has_features = True
-                # Scale raw cosine to 0.55 – 0.94 base range
-                sim_score = 0.55 + (sim_score * 0.39)
+        with stage_timer("recommend", "score"):
+            if snapshot is not None:
+                folded, norms, dims = snapshot.vectors(fetch_limit)
+                has_vector = dims > 0
             else:
-                sim_score = round(0.55 + (np.random.random() * 0.30), 2)
-
-            # ── Bonus: body-type appropriate category → +0.10 ─────────────
-            if recommended_cats and outfit_cat in recommended_cats:
-                sim_score += 0.10
-
-            # ── Bonus: skin-tone appropriate color → +0.05 ────────────────
-            if recommended_colors and outfit_color in recommended_colors:
-                sim_score += 0.05
-
-            # ── Bonus: height-appropriate category → +0.05 ────────────────
-            if height_boost_cats and outfit_cat in height_boost_cats:
-                sim_score += 0.05
-
-            # Keep score in [0.55, 0.99]
-            sim_score = round(min(max(sim_score, 0.55), 0.99), 2)
-
-            image_path = outfit.get("image_path", "")
-            image_url  = f"http://127.0.0.1:8000/outfit_images/{image_path}" if image_path else None
-
-            recommendations.append({
-                "rank":                  0,
-                "outfit_name":           outfit.get("name", "Outfit"),
-                "image_url":             image_url,
-                "category":              outfit_cat,
-                "color":                 outfit_color or "multi",
-                "sleeves":               (outfit.get("sleeves") or "unknown").lower().strip(),
-                "occasion":              (outfit.get("occasion") or "casual").lower().strip(),
-                "similarity_score":      sim_score,
-                "similarity_percentage": f"{int(sim_score * 100)}%",
-            })
-
-        if has_features:
-            print("   ✅ Using REAL cosine similarity (body + skin + height bonuses)")
-        else:
-            print("   ⚠️  No feature vectors found — run mobilenet_service.py first")
+                folded, norms, dims, has_vector = load_folded(all_outfits, embedding_version, fetch_vectors)
+            cosines      = folded_cosine(user_profile, folded, norms, dims)
+            has_features = bool(has_vector.any())
+
+            recommendations = []
+            for i, outfit in enumerate(all_outfits):
+                outfit_cat      = (outfit.get("category") or "").lower().strip()
+                outfit_color    = (outfit.get("color")    or "").lower().strip()
+
+                # ── Cosine similarity (precomputed above) ──────────────────────
+                if has_vector[i]:
+                    # Scale raw cosine to 0.55 – 0.94 base range
+                    sim_score = 0.55 + (float(cosines[i]) * 0.39)
+                else:
+                    sim_score = round(0.55 + (np.random.random() * 0.30), 2)
+
+                # ── Bonus: body-type appropriate category → +0.10 ─────────────
+                if recommended_cats and outfit_cat in recommended_cats:
+                    sim_score += 0.10
+
+                # ── Bonus: skin-tone appropriate color → +0.05 ────────────────
+                if recommended_colors and outfit_color in recommended_colors:
+                    sim_score += 0.05
+
+                # ── Bonus: height-appropriate category → +0.05 ────────────────
+                if height_boost_cats and outfit_cat in height_boost_cats:
+                    sim_score += 0.05
+
+                # Keep score in [0.55, 0.99]
+                sim_score = round(min(max(sim_score, 0.55), 0.99), 2)
+
+                image_path = outfit.get("image_path", "")
+                # Grid-sized WebP thumbnail; the original stays available for detail views
+                image_url  = thumbnail_url(image_path) if image_path else None
+
+                recommendations.append({
+                    "rank":                  0,
+                    "outfit_name":           outfit.get("name", "Outfit"),
+                    "image_url":             image_url,
+                    "image_url_full":        original_url(image_path) if image_path else None,
+                    "category":              outfit_cat,
+                    "color":                 outfit_color or "multi",
+                    "sleeves":               (outfit.get("sleeves") or "unknown").lower().strip(),
+                    "occasion":              (outfit.get("occasion") or "casual").lower().strip(),
+                    "similarity_score":      sim_score,
+                    "similarity_percentage": f"{int(sim_score * 100)}%",
+                })
+
+        if not has_features:
+            logger.warning("No feature vectors found — run mobilenet_service.py first")
 
         # Sort by score descending, take top_k
-        recommendations.sort(key=lambda x: x["similarity_score"], reverse=True)
-        final_recs = recommendations[:top_k]
+        with stage_timer("recommend", "rank"):
+            recommendations.sort(key=lambda x: x["similarity_score"], reverse=True)
+            final_recs = recommendations[:top_k]
         for idx, rec in enumerate(final_recs):
             rec["rank"] = idx + 1
 
-        print(f"✅ Top score: {final_recs[0]['similarity_score'] if final_recs else 'N/A'}")
-        print(f"✅ Returning {len(final_recs)} recommendations\n")
+        logger.info("Recommendations generated", extra={"fields": {
+            "body_type": body_type,
+            "skin_tone": skin_tone,
+            "returned":  len(final_recs),
+            "top_score": final_recs[0]["similarity_score"] if final_recs else None,
+        }})
 
         return {
             "success":             True,
@@ -269,9 +364,7 @@ def get_recommendations(
         }
 
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Recommendation error: %s", e)
         return {"success": False, "error": str(e), "recommendations": []}
 
 
@@ -279,7 +372,7 @@ def get_outfit_by_name(outfit_name: str):
     try:
         if collection is None:
             return None
-        return collection.find_one({"name": outfit_name})
+        return collection.find_one({"name": outfit_name}, {"image": 0})
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
+        logger.error("Error fetching outfit %s: %s", outfit_name, e)
         return None
\ No newline at end of file
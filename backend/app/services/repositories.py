@@ -0,0 +1,203 @@
+"""
+Repositories - the async data-access API the routes await.
+
+Each repository wraps one collection of the Motor database
+(app/utils/async_db.py) and exposes only the operations the routes need.
+Handlers stay free of driver calls, and concurrent requests overlap their
+database latency instead of queuing behind each other on the event loop.
+
+    from app.services.repositories import images_repo
+    image = await images_repo.get(image_id)
+
+STORAGE_BACKEND selects the implementation behind the same names:
+  mongo   (default) the classes below
+  sqlite  embedded engine in app/services/storage_sqlite.py
+          (SQLITE_PATH=:memory: for a purely in-memory store)
+"""
+
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.utils.pagination import clamp_limit, page_of, seek_query
+
+# Outfit fields a wishlist / grid card needs (never the embeddings)
+CATALOG_CARD_FIELDS = {"category": 1, "color": 1, "sleeves": 1, "occasion": 1, "image_path": 1}
+
+
+class UserRepository:
+    def __init__(self, database):
+        self.collection = database["users"]
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"user_id": user_id}, {"_id": 0})
+
+    async def get_or_create(self, user_id: str) -> dict:
+        user = await self.get(user_id)
+        if user:
+            return user
+        user_doc = {"user_id": user_id, "created_at": datetime.utcnow()}
+        await self.collection.insert_one(dict(user_doc))
+        return user_doc
+
+    async def update(self, user_id: str, fields: dict) -> None:
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+
+class ImageRepository:
+    def __init__(self, database):
+        self.collection = database["user_images"]
+
+    async def insert(self, image_doc: dict) -> None:
+        await self.collection.insert_one(dict(image_doc))
+
+    async def get(self, image_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"image_id": image_id}, {"_id": 0})
+
+    async def page_for_user(self, user_id: str, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Newest-first page of a user's uploads: (images, next_cursor)."""
+        limit = clamp_limit(limit)
+        query, sort = seek_query({"user_id": user_id}, "uploaded_at", cursor)
+        docs = await self.collection.find(query).sort(sort).limit(limit + 1).to_list(length=None)
+        return page_of(docs, "uploaded_at", limit)
+
+    async def count_for_user(self, user_id: str) -> int:
+        return await self.collection.count_documents({"user_id": user_id})
+
+    async def delete(self, image_id: str) -> Optional[dict]:
+        """Remove the image record, returning it (None if it did not exist)."""
+        return await self.collection.find_one_and_delete({"image_id": image_id}, {"_id": 0})
+
+
+class FeatureRepository:
+    def __init__(self, database):
+        self.collection = database["user_features"]
+
+    async def insert(self, features_doc: dict) -> None:
+        await self.collection.insert_one(dict(features_doc))
+
+    async def get(self, image_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"image_id": image_id}, {"_id": 0})
+
+    async def delete(self, image_id: str) -> int:
+        result = await self.collection.delete_one({"image_id": image_id})
+        return result.deleted_count
+
+
+class WishlistRepository:
+    def __init__(self, database):
+        self.collection = database["wishlist"]
+
+    @staticmethod
+    def _add_update(user_id: str, item: dict) -> tuple:
+        # $setOnInsert: re-adding an outfit keeps its original saved_date
+        fields = {k: v for k, v in item.items() if k not in ("user_id", "outfit_name")}
+        return (
+            {"user_id": user_id, "outfit_name": item["outfit_name"]},
+            {"$setOnInsert": {**fields, "saved_date": datetime.utcnow()}},
+        )
+
+    async def add(self, user_id: str, item: dict) -> Optional[str]:
+        """
+        Atomic add backed by the unique (user_id, outfit_name) index.
+        Returns the new item id, or None if it was already saved.
+        """
+        filter_doc, update = self._add_update(user_id, item)
+        try:
+            result = await self.collection.update_one(filter_doc, update, upsert=True)
+        except DuplicateKeyError:
+            return None   # a concurrent add won the race
+        return str(result.upserted_id) if result.upserted_id is not None else None
+
+    async def add_many(self, user_id: str, items: List[dict]) -> int:
+        """Add several outfits in one bulk_write; returns how many were new."""
+        if not items:
+            return 0
+        ops = [UpdateOne(*self._add_update(user_id, item), upsert=True) for item in items]
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            return result.upserted_count
+        except BulkWriteError as bwe:
+            # Duplicate-key races are already-saved items, not failures
+            if any(err.get("code") != 11000 for err in bwe.details.get("writeErrors", [])):
+                raise
+            return bwe.details.get("nUpserted", 0)
+
+    async def remove(self, user_id: str, outfit_name: str) -> int:
+        result = await self.collection.delete_one({"user_id": user_id, "outfit_name": outfit_name})
+        return result.deleted_count
+
+    async def remove_many(self, user_id: str, outfit_names: List[str]) -> int:
+        if not outfit_names:
+            return 0
+        ops = [DeleteOne({"user_id": user_id, "outfit_name": name}) for name in outfit_names]
+        result = await self.collection.bulk_write(ops, ordered=False)
+        return result.deleted_count
+
+    async def clear(self, user_id: str) -> int:
+        result = await self.collection.delete_many({"user_id": user_id})
+        return result.deleted_count
+
+    async def page_hydrated(self, user_id: str, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Newest-first page of wishlist entries joined with their catalog
+        outfit in one aggregation: (entries, next_cursor). Each entry gains
+        an `outfit` sub-document (None once the outfit has left the
+        catalog). The join runs only for the page being returned.
+        """
+        limit = clamp_limit(limit)
+        query, sort = seek_query({"user_id": user_id}, "saved_date", cursor)
+        pipeline = [
+            {"$match": query},
+            {"$sort": dict(sort)},
+            {"$limit": limit + 1},
+            {"$lookup": {
+                "from":         "outfits",
+                "localField":   "outfit_name",
+                "foreignField": "name",      # indexed in app/utils/db.py
+                "pipeline":     [
+                    {"$limit": 1},
+                    {"$project": {"_id": 0, **CATALOG_CARD_FIELDS}},
+                ],
+                "as":           "outfit",
+            }},
+            {"$set": {"outfit": {"$first": "$outfit"}}},
+        ]
+        docs = await self.collection.aggregate(pipeline).to_list(length=None)
+        return page_of(docs, "saved_date", limit)
+
+    async def count(self, user_id: str) -> int:
+        return await self.collection.count_documents({"user_id": user_id})
+
+
+class CatalogRepository:
+    def __init__(self, database):
+        self.collection = database["outfits"]
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+
+if STORAGE_BACKEND == "sqlite":
+    from app.services.storage_sqlite import open_repositories
+    users_repo, images_repo, features_repo, wishlist_repo, catalog_repo = open_repositories()
+elif STORAGE_BACKEND == "mongo":
+    from app.utils.async_db import async_db
+    users_repo    = UserRepository(async_db)
+    images_repo   = ImageRepository(async_db)
+    features_repo = FeatureRepository(async_db)
+    wishlist_repo = WishlistRepository(async_db)
+    catalog_repo  = CatalogRepository(async_db)
+else:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND={STORAGE_BACKEND!r} (expected mongo or sqlite)")
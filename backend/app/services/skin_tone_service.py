@@ -1,9 +1,15 @@
 import cv2
 import numpy as np
 from typing import Dict, Any, Optional
+from app.services.image_context import ImageContext
+from app.utils.metrics import stage_timer
+from app.utils.logger import get_logger
 
+logger = get_logger(__name__)
 
-def analyze_skin_tone(image: np.ndarray, raw_landmarks=None) -> Dict[str, Any]:
+
+def analyze_skin_tone(image: np.ndarray, raw_landmarks=None,
+                      context: Optional[ImageContext] = None) -> Dict[str, Any]:
     """
     Analyze skin tone from image.
 
@@ -17,25 +23,34 @@ def analyze_skin_tone(image: np.ndarray, raw_landmarks=None) -> Dict[str, Any]:
     We do NOT use the HSV skin mask on the face crop because on a tight
     face region it pulls in lip/shadow pixels and shifts the L value dark.
     Instead we directly average the cheek patch pixels in LAB space.
+
+    Pass the request's ImageContext (shared with the body analyzer) so the
+    HSV plane used by the centre-crop fallback is converted only once.
     """
     try:
         h, w = image.shape[:2]
+        ctx = context or ImageContext(image)
 
-        if raw_landmarks is not None:
-            avg_b, avg_g, avg_r = _sample_cheeks(image, raw_landmarks, h, w)
-        else:
-            avg_b, avg_g, avg_r = _sample_centre_crop(image, h, w)
+        with stage_timer("skin_tone", "sample"):
+            if raw_landmarks is not None:
+                avg_b, avg_g, avg_r = _sample_cheeks(ctx, raw_landmarks, h, w)
+            else:
+                avg_b, avg_g, avg_r = _sample_centre_crop(ctx, h, w)
 
-        # Convert to LAB and read lightness
-        avg_color_bgr = np.uint8([[[avg_b, avg_g, avg_r]]])
-        avg_color_lab = cv2.cvtColor(avg_color_bgr, cv2.COLOR_BGR2LAB)
-        l_val = avg_color_lab[0, 0, 0]
+        with stage_timer("skin_tone", "classify"):
+            # Convert to LAB and read lightness
+            avg_color_bgr = np.uint8([[[avg_b, avg_g, avg_r]]])
+            avg_color_lab = cv2.cvtColor(avg_color_bgr, cv2.COLOR_BGR2LAB)
+            l_val = avg_color_lab[0, 0, 0]
 
-        skin_tone, confidence = _classify_skin_tone(l_val, avg_r, avg_g, avg_b)
+            skin_tone, confidence = _classify_skin_tone(l_val, avg_r, avg_g, avg_b)
 
-        print(f"✅ Skin Tone Analysis Complete:")
-        print(f"   Skin Tone:  {skin_tone} (confidence {confidence})")
-        print(f"   L Value:    {l_val}  RGB=({avg_r:.1f},{avg_g:.1f},{avg_b:.1f})")
+        logger.info("Skin tone analysis complete", extra={"fields": {
+            "skin_tone":  skin_tone,
+            "confidence": confidence,
+            "l_value":    int(l_val),
+        }})
+        logger.debug("RGB=(%.1f,%.1f,%.1f)", avg_r, avg_g, avg_b)
 
         return {
             "skin_tone":            skin_tone,
@@ -43,14 +58,14 @@ def analyze_skin_tone(image: np.ndarray, raw_landmarks=None) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"Skin tone analysis error: {str(e)}")
+        logger.exception("Skin tone analysis error: %s", e)
         return {
             "skin_tone":            "Unknown",
             "skin_tone_confidence": 0.0,
         }
 
 
-def _sample_cheeks(image: np.ndarray, landmarks, h: int, w: int):
+def _sample_cheeks(ctx: ImageContext, landmarks, h: int, w: int):
     """
     Sample pixel colors from cheek and forehead patches using face landmarks.
 
@@ -71,6 +86,7 @@ def _sample_cheeks(image: np.ndarray, landmarks, h: int, w: int):
     Each patch is a 20x20 pixel region. We average all three together.
     This gives a clean skin color reading with no lip/eye/hair contamination.
     """
+    image = ctx.image
     try:
         nose    = landmarks[0]
         l_eye   = landmarks[2]
@@ -120,21 +136,21 @@ def _sample_cheeks(image: np.ndarray, landmarks, h: int, w: int):
                 patches.append(result)
 
         if not patches:
-            return _sample_centre_crop(image, int(image.shape[0]), int(image.shape[1]))
+            return _sample_centre_crop(ctx, int(image.shape[0]), int(image.shape[1]))
 
         avg_b = np.mean([p[0] for p in patches])
         avg_g = np.mean([p[1] for p in patches])
         avg_r = np.mean([p[2] for p in patches])
 
-        print(f"   Cheek patches sampled: {len(patches)} (lc, rc, forehead)")
+        logger.debug("Cheek patches sampled: %d (lc, rc, forehead)", len(patches))
         return avg_b, avg_g, avg_r
 
     except Exception as e:
-        print(f"   Cheek sampling failed: {e} — using fallback")
-        return _sample_centre_crop(image, h, w)
+        logger.debug("Cheek sampling failed: %s — using fallback", e)
+        return _sample_centre_crop(ctx, h, w)
 
 
-def _sample_centre_crop(image: np.ndarray, h: int, w: int):
+def _sample_centre_crop(ctx: ImageContext, h: int, w: int):
     """
     Fallback: average the upper-centre region of the image.
     Assumes the face occupies the upper-centre area.
@@ -142,9 +158,9 @@ def _sample_centre_crop(image: np.ndarray, h: int, w: int):
     """
     y1, y2 = h // 8, h // 2
     x1, x2 = w // 4, 3 * w // 4
-    crop = image[y1:y2, x1:x2]
+    crop = ctx.image[y1:y2, x1:x2]
 
-    hsv  = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+    hsv  = ctx.hsv[y1:y2, x1:x2]
     mask = cv2.inRange(hsv,
                        np.array([0, 20, 70],  dtype=np.uint8),
                        np.array([20, 255, 255], dtype=np.uint8))
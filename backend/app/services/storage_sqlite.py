@@ -0,0 +1,484 @@
+"""
+Storage SQLite - embedded storage backend (STORAGE_BACKEND=sqlite).
+
+Implements the same repository API as the Mongo repositories in
+app/services/repositories.py, plus the catalog read the recommendation
+engine scores against, on a single local SQLite file. Single-node
+deployments and benchmark runs then need no external services, and
+lookups are sub-millisecond local reads. Those reads run inline on the
+event loop, because a thread hop would cost more than the query.
+
+Layout: each collection is a table with its lookup / sort keys as real
+indexed columns and the rest of the document as JSON (datetimes are
+round-tripped). Outfits keep their packed embedding, the folded 13-dim
+projection and the colour palette as BLOB columns, in the same encodings
+app/utils/embeddings.py and app/services/color_palette.py use for Mongo.
+
+Populate the catalog from Mongo (the active embedding version is
+flattened into the outfit row). The import replaces the whole table in
+one transaction, so outfits removed from Mongo disappear here too and
+readers never see a half-copied catalog:
+
+    STORAGE_BACKEND=sqlite python -m app.services.storage_sqlite import-catalog
+
+SQLITE_PATH=:memory: keeps everything in process memory. The import runs
+in its own process, so it can't fill an in-memory store. Import into a
+file instead and point SQLITE_SEED at it; the API process copies the seed
+into memory when it opens the store:
+
+    SQLITE_PATH=storage/seed.sqlite3 python -m app.services.storage_sqlite import-catalog
+    SQLITE_PATH=:memory: SQLITE_SEED=storage/seed.sqlite3 uvicorn app.main:app
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from app.utils.embeddings import decode_embedding, encode_embedding
+from app.utils.pagination import clamp_limit, decode_cursor, encode_cursor
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "storage/ai_fashion.sqlite3")
+SQLITE_SEED = os.getenv("SQLITE_SEED")   # copied into a :memory: store on open
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id      TEXT PRIMARY KEY,
+    doc          TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_images (
+    image_id     TEXT PRIMARY KEY,
+    user_id      TEXT NOT NULL,
+    uploaded_at  TEXT NOT NULL,
+    doc          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_images_by_user ON user_images (user_id, uploaded_at DESC);
+CREATE TABLE IF NOT EXISTS user_features (
+    image_id     TEXT PRIMARY KEY,
+    user_id      TEXT NOT NULL,
+    doc          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_features_by_user ON user_features (user_id);
+CREATE TABLE IF NOT EXISTS wishlist (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id      TEXT NOT NULL,
+    outfit_name  TEXT NOT NULL,
+    saved_date   TEXT NOT NULL,
+    doc          TEXT NOT NULL,
+    UNIQUE (user_id, outfit_name)
+);
+CREATE INDEX IF NOT EXISTS wishlist_by_date ON wishlist (user_id, saved_date DESC, id DESC);
+CREATE TABLE IF NOT EXISTS outfits (
+    name            TEXT NOT NULL,
+    image_path      TEXT NOT NULL UNIQUE,
+    category        TEXT,
+    color           TEXT,
+    sleeves         TEXT,
+    occasion        TEXT,
+    model_version   TEXT,
+    embedding       BLOB,
+    embedding_dtype TEXT,
+    embedding_dim   INTEGER,
+    folded          BLOB,
+    norm            REAL,
+    palette         BLOB,
+    palette_k       INTEGER
+);
+CREATE INDEX IF NOT EXISTS outfits_by_name ON outfits (name);
+"""
+
+OUTFIT_CARD_COLUMNS = ("name", "category", "color", "sleeves", "occasion", "image_path")
+
+
+# ── JSON documents with datetimes ─────────────────────────────────────────────
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat(timespec="microseconds")}
+    return str(value)
+
+
+def _json_hook(obj: dict):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _dumps(doc: dict) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, default=_json_default)
+
+
+def _loads(text: Optional[str]) -> Optional[dict]:
+    return json.loads(text, object_hook=_json_hook) if text else None
+
+
+def _blob(value) -> Optional[bytes]:
+    # bson Binary → plain bytes for the BLOB columns
+    return None if value is None else bytes(value)
+
+
+def _sort_key(value: datetime) -> str:
+    # Fixed-width ISO text so lexicographic order == time order
+    return value.isoformat(timespec="microseconds")
+
+
+class SqliteStore:
+    """One shared connection; the lock serialises the event loop and engine threads."""
+
+    def __init__(self, path: str = SQLITE_PATH, seed: Optional[str] = SQLITE_SEED):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        if path == ":memory:" and seed:
+            if not Path(seed).is_file():
+                raise FileNotFoundError(f"SQLITE_SEED not found: {seed}")
+            source = sqlite3.connect(seed)
+            try:
+                source.backup(self.conn)
+            finally:
+                source.close()
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def write(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self.lock, self.conn:
+            return self.conn.execute(sql, params)
+
+    def write_many(self, sql: str, rows) -> int:
+        """Run one statement over many rows in a single transaction; returns rows changed."""
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(sql, rows)
+            return self.conn.total_changes - before
+
+    # ── Catalog reads for the recommendation engine ───────────────────────
+    def scoring_rows(self, limit: int) -> List[dict]:
+        """Outfit card fields + folded projection, shaped like the Mongo documents."""
+        rows = self.query(
+            f"SELECT rowid AS _id, {', '.join(OUTFIT_CARD_COLUMNS)}, folded, norm, embedding_dim "
+            "FROM outfits LIMIT ?", (limit,),
+        )
+        return [dict(row) for row in rows]
+
+    def embedding_rows(self, ids: List[int]) -> List[dict]:
+        marks = ", ".join("?" * len(ids))
+        rows = self.query(
+            f"SELECT rowid AS _id, embedding, embedding_dtype, embedding_dim FROM outfits WHERE rowid IN ({marks})",
+            tuple(ids),
+        )
+        return [dict(row) for row in rows]
+
+    def palette_docs(self) -> List[dict]:
+        rows = self.query(
+            "SELECT name, category, color, image_path, palette FROM outfits WHERE palette IS NOT NULL"
+        )
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _outfit_rows(docs: List[dict], version: Optional[str]) -> Tuple[List[tuple], int]:
+        """
+        Outfit rows from Mongo-shaped documents, plus how many were skipped.
+        Name-only outfits (add_outfits.py, bulk_insert_outfits.py) have no
+        image_path to key on.
+        """
+        rows, skipped = [], 0
+        for doc in docs:
+            if not doc.get("image_path") or not doc.get("name"):
+                skipped += 1
+                continue
+            vector = decode_embedding(doc, version)
+            packed = encode_embedding([] if vector is None else vector,
+                                      version or doc.get("model_version") or "unknown")
+            rows.append((
+                doc.get("name"), doc.get("image_path"), doc.get("category"), doc.get("color"),
+                doc.get("sleeves"), doc.get("occasion"), packed["model_version"],
+                _blob(packed["embedding"]), packed["embedding_dtype"], packed["embedding_dim"],
+                _blob(packed.get("folded")), packed.get("norm"),
+                _blob(doc.get("palette")), doc.get("palette_k"),
+            ))
+        return rows, skipped
+
+    def upsert_outfits(self, docs: List[dict], version: Optional[str] = None) -> Tuple[int, int]:
+        """Insert or replace outfit rows; returns (rows written, docs skipped)."""
+        rows, skipped = self._outfit_rows(docs, version)
+        written = self.write_many(UPSERT_OUTFIT, rows) if rows else 0
+        return written, skipped
+
+    def replace_outfits(self, batches: Iterable[List[dict]], version: Optional[str] = None,
+                        progress: Optional[Callable[[int], None]] = None) -> Tuple[int, int, int]:
+        """
+        Make the outfits table exactly the documents in `batches`, in one
+        transaction: every row is upserted, then rows whose image_path was
+        not seen are deleted. Returns (written, skipped, removed).
+        """
+        written = skipped = 0
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_seen (image_path TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM import_seen")
+            for docs in batches:
+                rows, missing = self._outfit_rows(docs, version)
+                skipped += missing
+                if not rows:
+                    continue
+                before = self.conn.total_changes
+                self.conn.executemany(UPSERT_OUTFIT, rows)
+                written += self.conn.total_changes - before
+                self.conn.executemany("INSERT OR IGNORE INTO import_seen (image_path) VALUES (?)",
+                                      [(row[1],) for row in rows])
+                if progress:
+                    progress(written)
+            removed = self.conn.execute(
+                "DELETE FROM outfits WHERE image_path NOT IN (SELECT image_path FROM import_seen)"
+            ).rowcount
+            self.conn.execute("DELETE FROM import_seen")
+        return written, skipped, removed
+
+
+UPSERT_OUTFIT = (
+    "INSERT OR REPLACE INTO outfits (name, image_path, category, color, sleeves, occasion, "
+    "model_version, embedding, embedding_dtype, embedding_dim, folded, norm, palette, palette_k) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_store = {"value": None}
+
+
+def get_store() -> SqliteStore:
+    if _store["value"] is None:
+        _store["value"] = SqliteStore()
+    return _store["value"]
+
+
+def _seek_page(store: SqliteStore, table: str, sort_field: str, tie_column: str,
+               where: str, params: tuple, limit: Optional[int], cursor: Optional[str],
+               columns: str = "doc") -> Tuple[List[sqlite3.Row], Optional[str]]:
+    """Keyset page ordered by (sort_field desc, tie desc); mirrors app/utils/pagination.py."""
+    limit = clamp_limit(limit)
+    sql, args = f"SELECT {tie_column} AS tie, {columns} FROM {table} WHERE {where}", list(params)
+    if cursor:
+        last_value, last_tie = decode_cursor(cursor, id_type=int)
+        sql += f" AND ({sort_field} < ? OR ({sort_field} = ? AND {tie_column} < ?))"
+        args += [_sort_key(last_value), _sort_key(last_value), last_tie]
+    sql += f" ORDER BY {sort_field} DESC, {tie_column} DESC LIMIT ?"
+    rows = store.query(sql, tuple(args) + (limit + 1,))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(datetime.fromisoformat(last[sort_field.split(".")[-1]]), last["tie"])
+    return rows, next_cursor
+
+
+# ── Repositories (same API as app/services/repositories.py) ──────────────────
+class SqliteUserRepository:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        rows = self.store.query("SELECT doc FROM users WHERE user_id = ?", (user_id,))
+        return _loads(rows[0]["doc"]) if rows else None
+
+    async def get_or_create(self, user_id: str) -> dict:
+        user_doc = {"user_id": user_id, "created_at": datetime.utcnow()}
+        self.store.write("INSERT OR IGNORE INTO users (user_id, doc) VALUES (?, ?)",
+                         (user_id, _dumps(user_doc)))
+        return await self.get(user_id)
+
+    async def update(self, user_id: str, fields: dict) -> None:
+        with self.store.lock, self.store.conn:
+            row = self.store.conn.execute("SELECT doc FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            doc = _loads(row["doc"]) if row else {"user_id": user_id}
+            doc.update(fields, updated_at=datetime.utcnow())
+            self.store.conn.execute("INSERT OR REPLACE INTO users (user_id, doc) VALUES (?, ?)",
+                                    (user_id, _dumps(doc)))
+
+
+class SqliteImageRepository:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    async def insert(self, image_doc: dict) -> None:
+        self.store.write(
+            "INSERT INTO user_images (image_id, user_id, uploaded_at, doc) VALUES (?, ?, ?, ?)",
+            (image_doc["image_id"], image_doc["user_id"], _sort_key(image_doc["uploaded_at"]), _dumps(image_doc)),
+        )
+
+    async def get(self, image_id: str) -> Optional[dict]:
+        rows = self.store.query("SELECT doc FROM user_images WHERE image_id = ?", (image_id,))
+        return _loads(rows[0]["doc"]) if rows else None
+
+    async def page_for_user(self, user_id: str, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        rows, next_cursor = _seek_page(self.store, "user_images", "uploaded_at", "rowid",
+                                       "user_id = ?", (user_id,), limit, cursor,
+                                       columns="uploaded_at, doc")
+        return [_loads(row["doc"]) for row in rows], next_cursor
+
+    async def count_for_user(self, user_id: str) -> int:
+        return self.store.query("SELECT COUNT(*) FROM user_images WHERE user_id = ?", (user_id,))[0][0]
+
+    async def delete(self, image_id: str) -> Optional[dict]:
+        with self.store.lock, self.store.conn:
+            row = self.store.conn.execute("SELECT doc FROM user_images WHERE image_id = ?", (image_id,)).fetchone()
+            self.store.conn.execute("DELETE FROM user_images WHERE image_id = ?", (image_id,))
+        return _loads(row["doc"]) if row else None
+
+
+class SqliteFeatureRepository:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    async def insert(self, features_doc: dict) -> None:
+        self.store.write(
+            "INSERT INTO user_features (image_id, user_id, doc) VALUES (?, ?, ?)",
+            (features_doc["image_id"], features_doc["user_id"], _dumps(features_doc)),
+        )
+
+    async def get(self, image_id: str) -> Optional[dict]:
+        rows = self.store.query("SELECT doc FROM user_features WHERE image_id = ?", (image_id,))
+        return _loads(rows[0]["doc"]) if rows else None
+
+    async def delete(self, image_id: str) -> int:
+        return self.store.write("DELETE FROM user_features WHERE image_id = ?", (image_id,)).rowcount
+
+
+class SqliteWishlistRepository:
+    INSERT = ("INSERT OR IGNORE INTO wishlist (user_id, outfit_name, saved_date, doc) "
+              "VALUES (?, ?, ?, ?)")
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    @staticmethod
+    def _row(user_id: str, item: dict) -> tuple:
+        saved_date = datetime.utcnow()
+        doc = {**item, "user_id": user_id, "saved_date": saved_date}
+        return user_id, item["outfit_name"], _sort_key(saved_date), _dumps(doc)
+
+    async def add(self, user_id: str, item: dict) -> Optional[str]:
+        cursor = self.store.write(self.INSERT, self._row(user_id, item))
+        return str(cursor.lastrowid) if cursor.rowcount == 1 else None
+
+    async def add_many(self, user_id: str, items: List[dict]) -> int:
+        if not items:
+            return 0
+        return self.store.write_many(self.INSERT, [self._row(user_id, item) for item in items])
+
+    async def remove(self, user_id: str, outfit_name: str) -> int:
+        return self.store.write("DELETE FROM wishlist WHERE user_id = ? AND outfit_name = ?",
+                                (user_id, outfit_name)).rowcount
+
+    async def remove_many(self, user_id: str, outfit_names: List[str]) -> int:
+        if not outfit_names:
+            return 0
+        return self.store.write_many("DELETE FROM wishlist WHERE user_id = ? AND outfit_name = ?",
+                                     [(user_id, name) for name in outfit_names])
+
+    async def clear(self, user_id: str) -> int:
+        return self.store.write("DELETE FROM wishlist WHERE user_id = ?", (user_id,)).rowcount
+
+    async def page_hydrated(self, user_id: str, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        outfit_columns = ", ".join(f"o.{c} AS o_{c}" for c in OUTFIT_CARD_COLUMNS[1:])
+        rows, next_cursor = _seek_page(
+            self.store,
+            "wishlist w LEFT JOIN outfits o ON o.rowid = "
+            "(SELECT rowid FROM outfits WHERE name = w.outfit_name LIMIT 1)",
+            "w.saved_date", "w.id", "w.user_id = ?", (user_id,), limit, cursor,
+            columns=f"w.saved_date AS saved_date, w.doc AS doc, {outfit_columns}",
+        )
+        entries = []
+        for row in rows:
+            entry  = _loads(row["doc"])
+            outfit = {c: row[f"o_{c}"] for c in OUTFIT_CARD_COLUMNS[1:]}
+            entry["outfit"] = outfit if outfit["image_path"] is not None else None
+            entries.append(entry)
+        return entries, next_cursor
+
+    async def count(self, user_id: str) -> int:
+        return self.store.query("SELECT COUNT(*) FROM wishlist WHERE user_id = ?", (user_id,))[0][0]
+
+
+class SqliteCatalogRepository:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    async def count(self) -> int:
+        return self.store.query("SELECT COUNT(*) FROM outfits")[0][0]
+
+
+def open_repositories(store: Optional[SqliteStore] = None) -> tuple:
+    store = store or get_store()
+    return (
+        SqliteUserRepository(store),
+        SqliteImageRepository(store),
+        SqliteFeatureRepository(store),
+        SqliteWishlistRepository(store),
+        SqliteCatalogRepository(store),
+    )
+
+
+# ── CLI: copy the catalog out of Mongo ────────────────────────────────────────
+def _main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Embedded SQLite storage backend")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import-catalog", help="copy outfits from MongoDB into SQLITE_PATH")
+    imp.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if SQLITE_PATH == ":memory:":
+        print("❌ SQLITE_PATH=:memory: would import into a throwaway database that exits with this "
+              "process. Import into a file and start the API with SQLITE_SEED=<file> instead.")
+        return 2
+
+    from app.utils.db import db
+    from app.services.embedding_index import get_active_version
+    from app.utils.embeddings import embedding_projection
+
+    store   = get_store()
+    version = get_active_version(db, use_cache=False)
+    projection = {"_id": 0, **{c: 1 for c in OUTFIT_CARD_COLUMNS}, "model_version": 1,
+                  "palette": 1, "palette_k": 1, **embedding_projection(version)}
+
+    def batches():
+        batch = []
+        for doc in db["outfits"].find({}, projection).batch_size(args.batch_size):
+            batch.append(doc)
+            if len(batch) >= args.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    copied, skipped, removed = store.replace_outfits(
+        batches(), version, progress=lambda n: print(f"   💾 {n} outfits"),
+    )
+
+    print(f"✅ Copied {copied} outfits (embedding version: {version or 'top-level'}) → {SQLITE_PATH}")
+    if removed:
+        print(f"🗑️  Removed {removed} outfits no longer in MongoDB")
+    if skipped:
+        print(f"⚠️  Skipped {skipped} outfits without an image_path (name-only docs)")
+
+    # Lazy: the snapshot builder pulls in numpy and the engine
+    from app.services.catalog_snapshot import refresh_published
+    if refresh_published() is not None:
+        print("📦 Catalog snapshot rebuilt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,71 @@
+"""
+Thumbnail Service - precomputed multi-width WebP variants of catalog images.
+
+Thumbnails are generated during ingestion (ThumbnailExtractor in
+mobilenet_service.py) from the already-decoded image and laid out as
+
+    <THUMBNAIL_ROOT>/<width>/<category>/<name>.webp
+
+The /images/outfit/{image_path}?w=<width> route serves the closest
+precomputed width (falling back to the original file) with long-lived
+cache headers. Recommendations link to it through PUBLIC_BASE_URL.
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+THUMBNAIL_ROOT   = Path(os.getenv("THUMBNAIL_ROOT", "storage/thumbnails"))
+THUMBNAIL_WIDTHS = sorted(int(w) for w in os.getenv("THUMBNAIL_WIDTHS", "160,320,640").split(","))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+PUBLIC_BASE_URL     = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+DEFAULT_GRID_WIDTH  = int(os.getenv("RECOMMENDATION_THUMB_WIDTH", "320"))
+
+CATALOG_ROOT = Path("outfit_images")
+
+
+def thumbnail_path(image_path: str, width: int) -> Path:
+    """image_path is the catalog-relative path, e.g. "dress/abc.jpg"."""
+    return THUMBNAIL_ROOT / str(width) / Path(image_path).with_suffix(".webp")
+
+
+def pick_width(requested: Optional[int]) -> int:
+    """Smallest precomputed width ≥ requested (largest one if none is)."""
+    if not requested:
+        return DEFAULT_GRID_WIDTH if DEFAULT_GRID_WIDTH in THUMBNAIL_WIDTHS else THUMBNAIL_WIDTHS[0]
+    for width in THUMBNAIL_WIDTHS:
+        if width >= requested:
+            return width
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def generate_thumbnails(img: np.ndarray, image_path: str) -> List[int]:
+    """Write every configured width for one decoded BGR image; returns the widths written."""
+    h, w = img.shape[:2]
+    written = []
+    for width in THUMBNAIL_WIDTHS:
+        target_w = min(width, w)   # never upscale
+        target_h = max(1, round(h * target_w / w))
+        resized  = cv2.resize(img, (target_w, target_h), interpolation=cv2.INTER_AREA)
+        ok, buf  = cv2.imencode(".webp", resized, [cv2.IMWRITE_WEBP_QUALITY, THUMBNAIL_QUALITY])
+        if not ok:
+            continue
+        dest = thumbnail_path(image_path, width)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(".webp.tmp")
+        tmp.write_bytes(buf.tobytes())
+        os.replace(tmp, dest)
+        written.append(width)
+    return written
+
+
+def original_url(image_path: str) -> str:
+    return f"{PUBLIC_BASE_URL}/outfit_images/{image_path}"
+
+
+def thumbnail_url(image_path: str, width: int = DEFAULT_GRID_WIDTH) -> str:
+    return f"{PUBLIC_BASE_URL}/images/outfit/{image_path}?w={width}"
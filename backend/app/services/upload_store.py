@@ -0,0 +1,115 @@
+"""
+Upload Store - streamed, size-limited storage for user photo uploads.
+
+Uploads are copied to disk in UPLOAD_CHUNK_BYTES chunks and never held
+in memory whole:
+
+  - The first bytes are sniffed before anything is written. Files that are
+    not a known image format are rejected up front, whatever the client's
+    Content-Type says.
+  - Anything larger than UPLOAD_MAX_BYTES is rejected with 413 and the
+    partial file is removed.
+  - Files land in a hash-sharded tree, storage/uploads/ab/cd/<image_id>.jpg,
+    so no directory grows past a few hundred entries. The uuid4 image id
+    is uniformly random, which makes it a ready-made hash.
+
+decode_upload() decodes from a read-only memory map of the saved file
+instead of a second in-memory copy of the bytes. The SHA-256 computed
+while streaming is stored with the image and served as its ETag.
+
+Starlette spools the whole multipart body to a temp file before the
+route runs, so the checks in stream_upload() only fire after the upload
+has been received. UploadSizeLimit (mounted in app/main.py) rejects an
+oversized Content-Length with 413 before the body is read at all.
+Chunked uploads without a Content-Length still rely on the post-spool
+check.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import aiofiles
+import cv2
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from app.utils.blob_store import sniff_extension
+
+UPLOAD_ROOT        = Path(os.getenv("UPLOAD_DIR", "storage/uploads"))
+UPLOAD_MAX_BYTES   = int(os.getenv("UPLOAD_MAX_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+SNIFF_BYTES        = 16
+# Room for the multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+UPLOAD_ROOT.mkdir(parents=True, exist_ok=True)
+
+
+class UploadSizeLimit:
+    """ASGI middleware: 413 for upload requests whose Content-Length is over the limit."""
+
+    def __init__(self, app, paths: Tuple[str, ...], max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app       = app
+        self.paths     = paths
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths:
+            length = dict(scope["headers"]).get(b"content-length")
+            if length is not None and length.isdigit() and int(length) > self.max_bytes:
+                response = JSONResponse(
+                    {"detail": f"Image exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB upload limit"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def upload_path(image_id: str, ext: str) -> Path:
+    key = image_id.replace("-", "")
+    return UPLOAD_ROOT / key[:2] / key[2:4] / f"{image_id}.{ext}"
+
+
+async def stream_upload(file: UploadFile, image_id: str) -> Tuple[Path, int, str]:
+    """Stream `file` to its sharded path; returns (path, bytes written, sha256 hex)."""
+    head = await file.read(SNIFF_BYTES)
+    ext  = sniff_extension(head, default="")
+    if not ext:
+        raise HTTPException(status_code=400, detail="File is not a supported image (JPEG, PNG, GIF, WebP, BMP, TIFF)")
+
+    path = upload_path(image_id, ext)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".part")
+
+    size   = len(head)
+    digest = hashlib.sha256(head)
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            await out.write(head)
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Image exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB upload limit",
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return path, size, digest.hexdigest()
+
+
+def decode_upload(path: Path) -> Optional[np.ndarray]:
+    """Decode a saved upload straight from a memory map of the file."""
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    try:
+        return cv2.imdecode(mapped, cv2.IMREAD_COLOR)
+    finally:
+        del mapped
@@ -0,0 +1,35 @@
+"""
+Async MongoDB client (Motor) for the FastAPI routes.
+
+app/utils/db.py keeps the synchronous pymongo client for scripts, index
+creation and the ingest pipeline. Request handlers go through
+app/services/repositories.py, which awaits this client. A slow round-trip
+then yields the event loop instead of blocking every request on the
+worker.
+"""
+
+import os
+from dotenv import load_dotenv
+import certifi
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+MONGO_URL     = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+MONGO_DB_NAME = "ai_fashion"
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+
+# Motor binds to the running event loop on first use, so creating the
+# client at import time is safe under uvicorn.
+async_client = AsyncIOMotorClient(
+    MONGO_URL,
+    serverSelectionTimeoutMS=5000,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    tlsCAFile=certifi.where(),
+)
+async_db = async_client[MONGO_DB_NAME]
+
+__all__ = ["async_client", "async_db"]
@@ -0,0 +1,96 @@
+"""
+Content-addressed on-disk blob store for outfit images.
+
+A blob is named by the sha256 of its bytes and sharded two levels deep so
+no directory grows past a few thousand entries:
+
+    <BLOB_STORE_ROOT>/ab/cd/abcd…ef.jpg
+
+Documents reference a blob by its key ("<sha256>.<ext>") instead of
+embedding base64 image data. The bytes are served as static files under
+BLOB_URL_PREFIX. Identical images are stored once, and a blob never
+changes once written, so it can be cached forever.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+BLOB_STORE_ROOT = Path(os.getenv("BLOB_STORE_ROOT", "storage/blobs"))
+BLOB_URL_PREFIX = os.getenv("BLOB_URL_PREFIX", "/blobs")
+
+BLOB_STORE_ROOT.mkdir(parents=True, exist_ok=True)
+
+_MAGIC = [
+    (b"\xff\xd8\xff",        "jpg"),
+    (b"\x89PNG\r\n\x1a\n",   "png"),
+    (b"GIF87a",              "gif"),
+    (b"GIF89a",              "gif"),
+    (b"BM",                  "bmp"),
+    (b"II*\x00",             "tif"),
+    (b"MM\x00*",             "tif"),
+]
+
+
+def sniff_extension(data: bytes, default: str = "bin") -> str:
+    """Guess an image extension from its leading magic bytes."""
+    for magic, ext in _MAGIC:
+        if data.startswith(magic):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return default
+
+
+def _normalize_ext(ext: str) -> str:
+    ext = ext.lower().lstrip(".")
+    return "jpg" if ext == "jpeg" else ext
+
+
+def blob_path(key: str) -> Path:
+    """Filesystem path for a blob key ("<sha256>.<ext>")."""
+    return BLOB_STORE_ROOT / key[:2] / key[2:4] / key
+
+
+def blob_url(key: str) -> str:
+    return f"{BLOB_URL_PREFIX}/{key[:2]}/{key[2:4]}/{key}"
+
+
+def _commit(tmp_path: str, key: str) -> str:
+    dest = blob_path(key)
+    if dest.exists():
+        os.unlink(tmp_path)          # already stored — content-addressed dedupe
+        return key
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, dest)
+    return key
+
+
+def put_bytes(data: bytes, ext: Optional[str] = None) -> str:
+    """Store bytes and return the blob key."""
+    ext = _normalize_ext(ext or sniff_extension(data))
+    key = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    if blob_path(key).exists():
+        return key
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_STORE_ROOT, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return _commit(tmp_path, key)
+
+
+def put_file(path: str) -> str:
+    """Stream a file into the store (hashing while copying) and return its key."""
+    ext    = _normalize_ext(Path(path).suffix) or "bin"
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_STORE_ROOT, suffix=".tmp")
+    with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+        for chunk in iter(lambda: src.read(1 << 20), b""):
+            digest.update(chunk)
+            dst.write(chunk)
+    return _commit(tmp_path, f"{digest.hexdigest()}.{ext}")
+
+
+def exists(key: str) -> bool:
+    return blob_path(key).exists()
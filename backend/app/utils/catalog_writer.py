@@ -0,0 +1,144 @@
+"""
+Catalog Writer - shared bulk write path for the catalog maintenance scripts
+(add_outfits.py, bulk_insert_outfits.py, patch_sleeve_values.py).
+
+Queued operations are sent as unordered bulk_write batches instead of one
+round-trip per document:
+
+    with CatalogWriter(collection, batch_size=500, total=n, dry_run=False) as writer:
+        writer.upsert({"name": name}, {"$set": {...}})
+    print(writer.summary())
+
+Closing the writer (leaving the with block, or close()) after a real run
+also rebuilds the shared catalog snapshot if one is published
+(app/services/catalog_snapshot.py). Otherwise the API would keep scoring
+the pre-write catalog.
+
+Transient network errors are retried with exponential backoff. Dry-run
+mode counts operations without sending them. Each flush prints the
+throughput and ETA. distribution() computes value counts with a
+server-side $group so scripts never pull whole collections into Python.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError, ConnectionFailure, NetworkTimeout
+
+TRANSIENT_ERRORS = (AutoReconnect, ConnectionFailure, NetworkTimeout)
+
+
+class CatalogWriter:
+    def __init__(self, collection, batch_size: int = 500, dry_run: bool = False,
+                 retries: int = 3, total: Optional[int] = None, label: str = "docs"):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.dry_run    = dry_run
+        self.retries    = retries
+        self.total      = total
+        self.label      = label
+
+        self.sent      = 0
+        self.upserted  = 0
+        self.matched   = 0
+        self.modified  = 0
+        self.errors    = 0
+        self._ops: List = []
+        self._started  = time.perf_counter()
+
+    # ── Queueing ──────────────────────────────────────────────────────────
+    def upsert(self, filter_doc: dict, update: dict) -> None:
+        self._queue(UpdateOne(filter_doc, update, upsert=True))
+
+    def update_many(self, filter_doc: dict, update: dict) -> None:
+        self._queue(UpdateMany(filter_doc, update))
+
+    def _queue(self, op) -> None:
+        self._ops.append(op)
+        if len(self._ops) >= self.batch_size:
+            self.flush()
+
+    # ── Sending ───────────────────────────────────────────────────────────
+    def flush(self) -> None:
+        if not self._ops:
+            return
+        ops, self._ops = self._ops, []
+
+        if not self.dry_run:
+            self._write_with_retry(ops)
+        self.sent += len(ops)
+        print(f"   💾 {self.progress_line()}")
+
+    def _write_with_retry(self, ops: List) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                result = self.collection.bulk_write(ops, ordered=False)
+                self._tally(result.bulk_api_result)
+                return
+            except BulkWriteError as bwe:
+                # Unordered: everything but the failed ops was applied
+                self._tally(bwe.details)
+                self.errors += len(bwe.details.get("writeErrors", []))
+                return
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                print(f"   ⚠️  Transient error ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _tally(self, details: dict) -> None:
+        self.upserted += details.get("nUpserted", 0)
+        self.matched  += details.get("nMatched", 0)
+        self.modified += details.get("nModified", 0)
+
+    # ── Reporting ─────────────────────────────────────────────────────────
+    def progress_line(self) -> str:
+        elapsed = time.perf_counter() - self._started
+        rate    = self.sent / elapsed if elapsed > 0 else 0.0
+        line    = f"{self.sent}"
+        if self.total:
+            eta   = (self.total - self.sent) / rate if rate > 0 else float("inf")
+            line += f"/{self.total} {self.label}  {rate:.0f}/s  ETA {eta:.0f}s"
+        else:
+            line += f" {self.label}  {rate:.0f}/s"
+        return line + ("  (dry run)" if self.dry_run else "")
+
+    def summary(self) -> str:
+        if self.dry_run:
+            return f"{self.sent} operations (dry run, nothing written)"
+        return (f"{self.upserted} inserted, {self.matched} matched, "
+                f"{self.modified} modified, {self.errors} errors")
+
+    def close(self) -> None:
+        """Flush what is queued and republish the catalog snapshot."""
+        self.flush()
+        if not self.dry_run:
+            # Lazy: the snapshot builder pulls in numpy and the engine
+            from app.services.catalog_snapshot import refresh_published
+            if refresh_published() is not None:
+                print("   📦 Catalog snapshot rebuilt")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+def distribution(collection, *fields: str, match: Optional[dict] = None) -> Dict[tuple, int]:
+    """Server-side value counts for one or more fields: {(v1, v2, ...): count}."""
+    pipeline = []
+    if match:
+        pipeline.append({"$match": match})
+    pipeline += [
+        {"$group": {"_id": {f: f"${f}" for f in fields}, "count": {"$sum": 1}}},
+        {"$sort": {f"_id.{f}": 1 for f in fields}},
+    ]
+    return {
+        tuple(row["_id"].get(f) for f in fields): row["count"]
+        for row in collection.aggregate(pipeline)
+    }
@@ -2,9 +2,13 @@ from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 import certifi
+from app.utils.indexes import ensure_indexes
+from app.utils.logger import get_logger
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 
 # Connect to MongoDB (pymongo 4.6.0)
@@ -16,9 +20,9 @@ try:
     )
     # Lazy ping - won't fail at startup if network is slow
     db = client["ai_fashion"]
-    print("✅ Connected to MongoDB")
+    logger.info("Connected to MongoDB")
 except Exception as e:
-    print(f"❌ Error connecting to MongoDB: {str(e)}")
+    logger.error("Error connecting to MongoDB: %s", e)
     raise
 
 # Define collections
@@ -26,17 +30,9 @@ users_collection = db["users"]
 user_images_collection = db["user_images"]
 user_features_collection = db["user_features"]
 outfits_collection = db["outfits"]
+wishlist_collection = db["wishlist"]
 
-# Create indexes
-try:
-    users_collection.create_index("user_id", unique=True)
-    user_images_collection.create_index("user_id")
-    user_images_collection.create_index("image_id", unique=True)
-    user_features_collection.create_index("image_id", unique=True)
-    user_features_collection.create_index("user_id")
-    outfits_collection.create_index("name")
-    print("✅ Database indexes created")
-except Exception as e:
-    print(f"⚠️  Warning creating indexes: {str(e)}")
+# Create indexes (app/utils/indexes.py; the API does the same on startup)
+ensure_indexes(db)
 
-__all__ = ['client', 'db', 'users_collection', 'user_images_collection', 'user_features_collection', 'outfits_collection']
\ No newline at end of file
+__all__ = ['client', 'db', 'users_collection', 'user_images_collection', 'user_features_collection', 'outfits_collection', 'wishlist_collection']
\ No newline at end of file
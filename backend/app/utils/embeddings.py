@@ -0,0 +1,135 @@
+"""
+Embedding (de)serialisation for outfit documents.
+
+Vectors are stored as packed little-endian float32 (or float16) BSON
+Binary blobs instead of arrays of doubles:
+
+    embedding        Binary  raw bytes, dim * itemsize
+    embedding_dtype  str     "float32" | "float16"
+    embedding_dim    int
+    model_version    str     extractor that produced the vector
+    folded           Binary  13 float32: the vector summed in strides of 13
+    norm             float   L2 norm of the full vector
+
+That is ~4x smaller than a BSON array (8-byte double + type tag + index
+key per element) and decodes zero-copy with np.frombuffer. Legacy
+documents that still carry a `features` array are read transparently.
+
+Several embedding spaces can coexist on one outfit under
+`embeddings.<version>`, each sub-document holding the same four fields.
+The version the engine scores against is chosen by the blue/green pointer
+in app/services/embedding_index.py.
+
+The engine's user vector is a 13-dim profile tiled to the vector length,
+so its dot product with an outfit vector equals the profile's dot product
+with that vector folded in strides of 13. Storing `folded` and `norm`
+lets the engine score on 13 floats per outfit. It only reads the full
+vector for visual similarity.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+from bson.binary import Binary
+
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+_NUMPY_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+# Fields a reader must project to be able to call decode_embedding()
+EMBEDDING_FIELDS = {"embedding": 1, "embedding_dtype": 1, "embedding_dim": 1, "features": 1}
+
+# Length of the user profile the engine tiles across the vector
+FOLD_STRIDE = 13
+FOLDED_FIELDS = {"folded": 1, "norm": 1, "embedding_dim": 1}
+
+
+def fold_vector(vector, stride: int = FOLD_STRIDE) -> np.ndarray:
+    """Sum a vector in strides: out[j] = Σ vector[i] for i ≡ j (mod stride)."""
+    arr = np.asarray(vector, dtype=np.float32).ravel()
+    pad = (-arr.size) % stride
+    if pad:
+        arr = np.concatenate([arr, np.zeros(pad, dtype=np.float32)])
+    return arr.reshape(-1, stride).sum(axis=0)
+
+
+def encode_embedding(vector, model_version: str, dtype: str = EMBEDDING_DTYPE) -> dict:
+    """Return the document fields for one vector (empty vector → no embedding)."""
+    arr = np.asarray(vector, dtype=_NUMPY_DTYPES[dtype]).ravel()
+    if arr.size == 0:
+        return {"embedding": None, "embedding_dtype": dtype, "embedding_dim": 0,
+                "model_version": model_version}
+    return {
+        "embedding":       Binary(arr.tobytes()),
+        "embedding_dtype": dtype,
+        "embedding_dim":   int(arr.size),
+        "model_version":   model_version,
+        # Computed from the stored precision so scores match the full vector
+        "folded":          Binary(fold_vector(arr).astype("<f4").tobytes()),
+        "norm":            float(np.linalg.norm(arr.astype(np.float32))),
+    }
+
+
+def validate_version(version: str) -> str:
+    if not version or "." in version or version.startswith("$"):
+        raise ValueError(f"Invalid embedding version name: {version!r}")
+    return version
+
+
+def versioned_fields(vector, version: str, dtype: str = EMBEDDING_DTYPE) -> dict:
+    """$set fields that write one vector into the `embeddings.<version>` space."""
+    return {f"embeddings.{validate_version(version)}": encode_embedding(vector, version, dtype)}
+
+
+def embedding_projection(version: Optional[str] = None) -> dict:
+    """
+    Projection for decode_embedding(doc, version). An active version is
+    always complete, so only that space is fetched.
+    """
+    if version:
+        return {f"embeddings.{version}": 1}
+    return dict(EMBEDDING_FIELDS)
+
+
+def folded_projection(version: Optional[str] = None) -> dict:
+    """Projection for decode_folded(doc, version): 13 floats instead of the full vector."""
+    if version:
+        return {f"embeddings.{version}.{field}": 1 for field in FOLDED_FIELDS}
+    return dict(FOLDED_FIELDS)
+
+
+def decode_folded(doc: dict, version: Optional[str] = None):
+    """(folded, norm, dim) for a document, or None if it predates folded fields."""
+    if version:
+        space = (doc.get("embeddings") or {}).get(version)
+        if space:
+            return decode_folded(space)
+
+    blob = doc.get("folded")
+    if not blob or doc.get("norm") is None:
+        return None
+    return np.frombuffer(blob, dtype="<f4"), float(doc["norm"]), int(doc.get("embedding_dim") or 0)
+
+
+def decode_embedding(doc: dict, version: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    Read-only float32 view (float16 is widened) of a document's vector.
+    With a version, reads `embeddings.<version>` first; otherwise (or if
+    that space is missing) the top-level blob, then a legacy `features`
+    list. None if there is no vector.
+    """
+    if version:
+        space = (doc.get("embeddings") or {}).get(version)
+        if space:
+            return decode_embedding(space)
+
+    blob = doc.get("embedding")
+    if blob:
+        arr = np.frombuffer(blob, dtype=_NUMPY_DTYPES[doc.get("embedding_dtype", "float32")])
+        return arr if arr.dtype == np.float32 else arr.astype(np.float32)
+
+    features = doc.get("features")
+    if features:
+        return np.asarray(features, dtype=np.float32)
+    return None
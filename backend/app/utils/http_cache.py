@@ -0,0 +1,111 @@
+"""
+HTTP caching helpers: strong ETags, Last-Modified, conditional requests
+(304 Not Modified) and Cache-Control policies.
+
+    return cached_json(request, payload, cache_control=CACHE_SHORT)
+    return cached_file(request, path, cache_control=CACHE_IMMUTABLE_PRIVATE, etag=sha256)
+
+JSON bodies get an ETag from the SHA-256 of the serialised bytes. Files
+use a caller-supplied content hash when one is known (uploads, blobs).
+Otherwise the tag is derived from size + mtime, which is still strong
+here because stored files are only ever written once, under a fresh name.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+# Cache-Control policies
+CACHE_IMMUTABLE         = "public, max-age=31536000, immutable"    # content-addressed
+CACHE_IMMUTABLE_PRIVATE = "private, max-age=31536000, immutable"   # per-user, never rewritten
+CACHE_CATALOG_IMAGE     = "public, max-age=86400"
+CACHE_SHORT             = "public, max-age=30"
+CACHE_PRIVATE_SHORT     = "private, max-age=300"
+CACHE_REVALIDATE        = "public, no-cache"                      # stand-ins that will be replaced
+
+
+def strong_etag(digest: str) -> str:
+    return f'"{digest}"'
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return strong_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def http_date(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """RFC 9110 precedence: If-None-Match wins; If-Modified-Since only without it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _validator_headers(etag: str, cache_control: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def cached_json(request: Request, payload, cache_control: str = CACHE_SHORT,
+                last_modified: Optional[datetime] = None) -> Response:
+    """JSON response with a content ETag; 304 if the client's copy is current."""
+    body    = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    etag    = strong_etag(hashlib.sha256(body).hexdigest()[:32])
+    headers = _validator_headers(etag, cache_control, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def cached_file(request: Request, path: Path, cache_control: str,
+                etag: Optional[str] = None, media_type: Optional[str] = None) -> Response:
+    """FileResponse with ETag / Last-Modified; 304 if the client's copy is current."""
+    stat          = path.stat()
+    etag          = strong_etag(etag) if etag else file_etag(stat)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    headers       = _validator_headers(etag, cache_control, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return FileResponse(str(path), media_type=media_type, headers=headers, stat_result=stat)
+
+
+class CachingStaticFiles(StaticFiles):
+    """StaticFiles (which already answers conditional requests) plus a Cache-Control policy."""
+
+    def __init__(self, *args, cache_control: str = CACHE_CATALOG_IMAGE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
@@ -0,0 +1,103 @@
+"""
+MongoDB index definitions, shared by the sync client (scripts, ingest,
+app/utils/db.py) and the async client (API startup, app/main.py).
+
+Every index is created in its own try, so one failure can't skip the
+rest. Failing to build a plain index only costs speed, so it is logged
+and startup goes on. A unique index that can't be built is a correctness
+problem, because code relies on it (the atomic /wishlist/add upsert), so
+it raises. If MongoDB is unreachable, nothing is built and an error is
+logged.
+
+Wishlists written before the unique (user_id, outfit_name) index existed
+can hold duplicates, which would make the index build fail. They are
+collapsed first, keeping the oldest entry of each pair.
+"""
+
+from pymongo.errors import ConnectionFailure, OperationFailure
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (collection, keys, options)
+INDEXES = [
+    ("users",         "user_id",  {"unique": True}),
+    ("user_images",   "user_id",  {}),
+    # Keyset pagination: newest-first per user, _id as tie-breaker (app/utils/pagination.py)
+    ("user_images",   [("user_id", 1), ("uploaded_at", -1), ("_id", -1)], {}),
+    ("user_images",   "image_id", {"unique": True}),
+    ("user_features", "image_id", {"unique": True}),
+    ("user_features", "user_id",  {}),
+    ("outfits",       "name",       {}),
+    ("outfits",       "image_path", {}),
+    # One entry per (user, outfit) — lets /wishlist/add upsert atomically
+    ("wishlist",      [("user_id", 1), ("outfit_name", 1)], {"unique": True}),
+    ("wishlist",      [("user_id", 1), ("saved_date", -1), ("_id", -1)], {}),
+]
+
+# Every (user_id, outfit_name) pair with more than one entry; ids oldest first
+WISHLIST_DUPLICATES = [
+    {"$sort": {"saved_date": 1, "_id": 1}},
+    {"$group": {"_id": {"user_id": "$user_id", "outfit_name": "$outfit_name"},
+                "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+    {"$match": {"count": {"$gt": 1}}},
+]
+
+
+def _surplus_ids(groups) -> list:
+    return [_id for group in groups for _id in group["ids"][1:]]
+
+
+def _index_failed(name: str, keys, options: dict, error: Exception) -> None:
+    if options.get("unique") and isinstance(error, OperationFailure):
+        logger.error("Unique index on %s %s could not be built: %s", name, keys, error)
+        raise error
+    logger.warning("Could not create index on %s %s: %s", name, keys, error)
+
+
+def dedupe_wishlist(db) -> int:
+    """Delete all but the oldest entry of each duplicated pair; returns rows removed."""
+    surplus = _surplus_ids(db["wishlist"].aggregate(WISHLIST_DUPLICATES, allowDiskUse=True))
+    if surplus:
+        db["wishlist"].delete_many({"_id": {"$in": surplus}})
+        logger.warning("Removed %d duplicate wishlist entries", len(surplus))
+    return len(surplus)
+
+
+def ensure_indexes(db) -> None:
+    try:
+        dedupe_wishlist(db)
+    except ConnectionFailure as e:
+        logger.error("MongoDB unreachable, indexes not ensured: %s", e)
+        return
+    for name, keys, options in INDEXES:
+        try:
+            db[name].create_index(keys, **options)
+        except Exception as e:
+            _index_failed(name, keys, options, e)
+    logger.info("Database indexes ensured")
+
+
+async def dedupe_wishlist_async(db) -> int:
+    cursor  = db["wishlist"].aggregate(WISHLIST_DUPLICATES, allowDiskUse=True)
+    surplus = _surplus_ids(await cursor.to_list(length=None))
+    if surplus:
+        await db["wishlist"].delete_many({"_id": {"$in": surplus}})
+        logger.warning("Removed %d duplicate wishlist entries", len(surplus))
+    return len(surplus)
+
+
+async def ensure_indexes_async(db) -> None:
+    """Same as ensure_indexes(), on the Motor client (API startup)."""
+    try:
+        await dedupe_wishlist_async(db)
+    except ConnectionFailure as e:
+        logger.error("MongoDB unreachable, indexes not ensured: %s", e)
+        return
+    for name, keys, options in INDEXES:
+        try:
+            await db[name].create_index(keys, **options)
+        except Exception as e:
+            _index_failed(name, keys, options, e)
+    logger.info("Database indexes ensured")
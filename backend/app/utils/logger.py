@@ -0,0 +1,125 @@
+"""
+Structured, level-gated logging for the API.
+
+All app loggers hang off the "app" root logger, whose only handler is a
+QueueHandler. Request threads resolve the %-arguments and render any
+traceback to text, kept apart from the message, then enqueue the record.
+A background QueueListener does the formatting (text line or JSON
+object, traceback in its own "exc" field) and the stdout write.
+
+Configuration (environment):
+    LOG_LEVEL   default level for app loggers            (default INFO)
+    LOG_LEVELS  per-module overrides, comma separated, e.g.
+                "app.services.mediapipe_service=DEBUG,app.routes=WARNING"
+    LOG_FORMAT  "text" (default) or "json"
+
+Use %-style arguments (logger.debug("S/H=%.3f", s_h)) so messages that
+are filtered out by level are never formatted.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROOT_LOGGER = "app"
+
+_listener = None
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts":     self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level":  record.levelname,
+            "logger": record.name,
+            "msg":    record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = record.stack_info
+        return json.dumps(payload, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += "  " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    The stdlib prepare() formats the whole record on the calling thread and
+    folds the traceback into msg. This one only resolves the message and
+    renders the traceback into exc_text, which the listener's formatters
+    emit separately. Traceback objects (which pin stack frames) never
+    cross the queue.
+    """
+
+    _tracebacks = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg  = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._tracebacks.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_level(name: str, default: int = logging.INFO) -> int:
+    level = logging.getLevelName(name.strip().upper())
+    return level if isinstance(level, int) else default
+
+
+def configure_logging() -> None:
+    """Install the queue handler/listener once per process."""
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(_parse_level(os.getenv("LOG_LEVEL", "INFO")))
+    root.propagate = False
+
+    for override in filter(None, os.getenv("LOG_LEVELS", "").split(",")):
+        if "=" in override:
+            module, level = override.split("=", 1)
+            logging.getLogger(module.strip()).setLevel(_parse_level(level))
+
+    stream = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        stream.setFormatter(_JsonFormatter())
+    else:
+        stream.setFormatter(_TextFormatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger under the "app" hierarchy (pass __name__)."""
+    configure_logging()
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
@@ -0,0 +1,55 @@
+"""
+Small thread-safe LRU cache with an optional TTL, for in-process lookups
+that are hit far more often than they change (image_id → file path,
+rendered responses, ...). Hits and misses are exported via the
+cache_requests_total metric under the cache's name.
+
+    paths = LRUCache("image_path", maxsize=10_000)
+    entry = paths.get(image_id)          # None on miss or expiry
+    paths.set(image_id, entry)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.utils.metrics import record_cache
+
+
+class LRUCache:
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.name    = name
+        self.maxsize = max(1, maxsize)
+        self.ttl     = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock   = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        record_cache(self.name, hit=entry is not None)
+        return None if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
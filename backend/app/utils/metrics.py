@@ -0,0 +1,136 @@
+"""
+Lightweight in-process metrics (Prometheus text exposition format).
+
+Stage timers wrap each step of the upload / analysis / recommendation
+pipelines and feed a latency histogram labelled by (pipeline, stage).
+Counters track things like cache hits and misses.
+
+Set METRICS_ENABLED=false to turn collection off: stage_timer() then
+hands back a shared no-op context manager, so the instrumented code pays
+one function call and nothing else.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name       = name
+        self.help_text  = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, val in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {val}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name       = name
+        self.help_text  = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets    = tuple(sorted(buckets))
+        # key → [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for i, bound in enumerate(self.buckets):
+                    le = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {series[i]}")
+                total = series[len(self.buckets)]
+                inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {total}")
+        return "\n".join(lines)
+
+
+# ── Registry ─────────────────────────────────────────────────────────────────
+STAGE_SECONDS = Histogram(
+    "fashion_stage_seconds",
+    "Latency of individual pipeline stages",
+    labelnames=("pipeline", "stage"),
+)
+
+CACHE_REQUESTS = Counter(
+    "fashion_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    labelnames=("cache", "result"),
+)
+
+REGISTRY = [STAGE_SECONDS, CACHE_REQUESTS]
+
+
+def stage_timer(pipeline: str, stage: str):
+    """Context manager timing one stage; a no-op when metrics are disabled."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return STAGE_SECONDS.time(pipeline=pipeline, stage=stage)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_prometheus() -> str:
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
@@ -0,0 +1,77 @@
+"""
+Keyset (seek) pagination for newest-first listings.
+
+Pages are read as "the next `limit` documents after the last one the
+client saw", ordered by (sort field desc, _id desc). With a matching
+compound index (see app/utils/db.py) each page is one index range scan.
+Its cost does not depend on how deep into the history the client is,
+unlike skip/offset.
+
+The cursor is opaque to clients: URL-safe base64 of the last document's
+sort value and tie-breaker id (an ObjectId for Mongo, a rowid for the
+embedded SQLite backend).
+
+    query, sort = seek_query({"user_id": uid}, "uploaded_at", cursor)
+    docs        = find(query).sort(sort).limit(limit + 1)
+    items, next_cursor = page_of(docs, "uploaded_at", limit)
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE     = 200
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value: datetime, tie_id: Any) -> str:
+    raw = json.dumps({"t": sort_value.isoformat(), "id": str(tie_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: Callable = ObjectId) -> Tuple[datetime, Any]:
+    """Inverse of encode_cursor; ValueError on anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data   = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), id_type(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def seek_query(base: dict, sort_field: str, cursor: Optional[str]) -> Tuple[dict, list]:
+    """Filter and sort spec for the page after `cursor` (first page if None)."""
+    sort = [(sort_field, -1), ("_id", -1)]
+    if not cursor:
+        return dict(base), sort
+    last_value, last_id = decode_cursor(cursor)
+    return {
+        **base,
+        "$or": [
+            {sort_field: {"$lt": last_value}},
+            {sort_field: last_value, "_id": {"$lt": last_id}},
+        ],
+    }, sort
+
+
+def page_of(docs: List[dict], sort_field: str, limit: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    Split a limit + 1 fetch into (items, next_cursor), dropping _id.
+    next_cursor is None on the last page.
+    """
+    has_more = len(docs) > limit
+    docs     = docs[:limit]
+    next_cursor = None
+    if has_more and docs:
+        next_cursor = encode_cursor(docs[-1][sort_field], docs[-1]["_id"])
+    for doc in docs:
+        doc.pop("_id", None)
+    return docs, next_cursor
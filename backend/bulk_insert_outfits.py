@@ -1,11 +1,19 @@
+import argparse
 import os
 import cv2
 import numpy as np
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.utils.catalog_writer import CatalogWriter, distribution
+from app.utils.embeddings import encode_embedding
 
 load_dotenv()
 
+parser = argparse.ArgumentParser(description="Insert placeholder outfit documents for every catalog image")
+parser.add_argument("--batch-size", type=int, default=500)
+parser.add_argument("--dry-run", action="store_true")
+args = parser.parse_args()
+
 MONGO_URI = os.getenv("MONGO_URL")
 if not MONGO_URI:
     print("❌ MONGO_URL not set")
@@ -50,14 +58,19 @@ def get_occasion(cat):
         return "casual"
 
 # Clear existing
-print("Clearing existing outfits...")
-result = collection.delete_many({})
-print(f"Deleted {result.deleted_count} existing outfits\n")
+if args.dry_run:
+    print("Dry run: existing outfits are left in place\n")
+else:
+    print("Clearing existing outfits...")
+    result = collection.delete_many({})
+    print(f"Deleted {result.deleted_count} existing outfits\n")
 
 total = 0
 failed = 0
 skipped = 0
 
+writer = CatalogWriter(collection, batch_size=args.batch_size, dry_run=args.dry_run, label="outfits")
+
 for category in sorted(os.listdir(DATASET_PATH)):
     cat_path = os.path.join(DATASET_PATH, category)
     if not os.path.isdir(cat_path):
@@ -74,9 +87,8 @@ for category in sorted(os.listdir(DATASET_PATH)):
         img_path = os.path.join(cat_path, img)
         
         try:
-            # Verify image can be read
-            img_data = cv2.imread(img_path)
-            if img_data is None:
+            # Verify the file has a decodable image header (no full decode)
+            if not cv2.haveImageReader(img_path):
                 skipped += 1
                 continue
             
@@ -89,34 +101,36 @@ for category in sorted(os.listdir(DATASET_PATH)):
                 "occasion": get_occasion(category),
                 "body_types": get_body_types(category),
                 "skin_tones": get_skin_tones("multi"),
-                "features": np.random.random(512).tolist()
+                **encode_embedding(np.random.random(512), "placeholder-512"),
             }
             
-            # Insert
-            collection.insert_one(doc)
+            # Queue an idempotent upsert; sent in unordered bulk batches
+            writer.upsert({"name": img, "category": category}, {"$set": doc})
             total += 1
             inserted += 1
-            
-            # Progress
-            if inserted % 50 == 0:
-                print(f"   ✅ Inserted {inserted}...")
         
         except Exception as e:
             print(f"   ❌ Error inserting {img}: {str(e)}")
             failed += 1
     
-    print(f"   ✅ {category} complete: {inserted} inserted\n")
+    print(f"   ✅ {category} complete: {inserted} queued\n")
+
+writer.close()   # also republishes the catalog snapshot
 
 print("="*60)
 print("✅ BULK INSERT COMPLETE")
 print("="*60)
-print(f"Total inserted: {total}")
-print(f"Total failed: {failed}")
+print(f"Total queued: {total}")
+print(f"Writes: {writer.summary()}")
+print(f"Total failed: {failed + writer.errors}")
 print(f"Total skipped: {skipped}")
 
 # Verify
-count = collection.count_documents({})
+count = collection.estimated_document_count()
 print(f"Total in database: {count}")
+print("Per category:")
+for (cat,), n in distribution(collection, "category").items():
+    print(f"   {cat}: {n}")
 
 # Sample
 sample = collection.find_one({})
@@ -0,0 +1,72 @@
+"""
+migrate_embeddings.py
+─────────────────────
+Run this ONCE to convert outfit `features` arrays (BSON doubles) into
+packed float32 `embedding` blobs (see app/utils/embeddings.py).
+Documents are about 4x smaller afterwards and load via np.frombuffer.
+
+Usage:
+    python migrate_embeddings.py [--dtype float16] [--batch-size 500] [--dry-run]
+
+Safe to re-run: only documents that still have a `features` array and
+no `embedding` are touched.
+"""
+
+import argparse
+import os
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+import certifi
+
+from app.utils.embeddings import encode_embedding
+from app.services.catalog_snapshot import refresh_published
+
+load_dotenv()
+
+MONGO_URI  = os.getenv("MONGO_URL")
+client     = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000, tlsCAFile=certifi.where())
+db         = client["ai_fashion"]
+collection = db["outfits"]
+
+# Legacy vectors carry no version, so infer it from their length
+VERSION_BY_DIM = {
+    1280: "mobilenet_v2-imagenet-avg-1280",
+    96:   "color_hist-hsv-96",
+    512:  "placeholder-512",
+}
+
+parser = argparse.ArgumentParser(description="Pack outfit feature arrays into binary embeddings")
+parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+parser.add_argument("--batch-size", type=int, default=500)
+parser.add_argument("--dry-run", action="store_true")
+args = parser.parse_args()
+
+query  = {"features": {"$type": "array"}, "embedding": {"$exists": False}}
+total  = collection.count_documents(query)
+print(f"🔧 Migrating {total} outfits to {args.dtype} binary embeddings...\n")
+
+ops, migrated = [], 0
+for doc in collection.find(query, {"_id": 1, "features": 1}).batch_size(args.batch_size):
+    features = doc.get("features") or []
+    version  = VERSION_BY_DIM.get(len(features), f"unknown-{len(features)}")
+    ops.append(UpdateOne(
+        {"_id": doc["_id"]},
+        {"$set": encode_embedding(features, version, dtype=args.dtype), "$unset": {"features": ""}},
+    ))
+    if len(ops) >= args.batch_size:
+        if not args.dry_run:
+            collection.bulk_write(ops, ordered=False)
+        migrated += len(ops)
+        ops = []
+        print(f"   ✅ {migrated}/{total}")
+
+if ops:
+    if not args.dry_run:
+        collection.bulk_write(ops, ordered=False)
+    migrated += len(ops)
+
+print(f"\n✅ Done! {migrated} documents {'would be ' if args.dry_run else ''}migrated")
+
+# Keep the API's shared catalog snapshot in step with what was just written
+if migrated and not args.dry_run and refresh_published() is not None:
+    print("📦 Catalog snapshot rebuilt")
@@ -0,0 +1,72 @@
+"""
+migrate_image_blobs.py
+──────────────────────
+Run this ONCE to move base64 `image` fields out of the outfits collection.
+The bytes are written into the content-addressed blob store
+(app/utils/blob_store.py) and each document keeps only an `image_blob`
+key. The `image` field is then removed.
+
+Usage:
+    python migrate_image_blobs.py [--batch-size 100] [--dry-run]
+
+Safe to re-run: only documents that still carry an `image` are touched.
+"""
+
+import argparse
+import base64
+import os
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+import certifi
+
+from app.utils.blob_store import put_bytes, sniff_extension
+from app.services.catalog_snapshot import refresh_published
+
+load_dotenv()
+
+MONGO_URI  = os.getenv("MONGO_URL")
+client     = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000, tlsCAFile=certifi.where())
+db         = client["ai_fashion"]
+collection = db["outfits"]
+
+parser = argparse.ArgumentParser(description="Move base64 outfit images into the blob store")
+parser.add_argument("--batch-size", type=int, default=100)
+parser.add_argument("--dry-run", action="store_true")
+args = parser.parse_args()
+
+query = {"image": {"$type": "string"}}
+total = collection.count_documents(query)
+print(f"🔧 Moving {total} embedded images into the blob store...\n")
+
+ops, moved, failed, freed = [], 0, 0, 0
+for doc in collection.find(query, {"_id": 1, "image": 1, "filename": 1}).batch_size(args.batch_size):
+    try:
+        data = base64.b64decode(doc["image"])
+    except Exception as e:
+        print(f"   ❌ {doc['_id']}: bad base64 ({e})")
+        failed += 1
+        continue
+
+    ext = os.path.splitext(doc.get("filename") or "")[1] or sniff_extension(data)
+    key = f"(dry-run).{ext}" if args.dry_run else put_bytes(data, ext)
+    freed += len(doc["image"])
+    ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"image_blob": key}, "$unset": {"image": ""}}))
+
+    if len(ops) >= args.batch_size:
+        if not args.dry_run:
+            collection.bulk_write(ops, ordered=False)
+        moved += len(ops)
+        ops = []
+        print(f"   ✅ {moved}/{total}")
+
+if ops:
+    if not args.dry_run:
+        collection.bulk_write(ops, ordered=False)
+    moved += len(ops)
+
+print(f"\n✅ Done! {moved} moved, {failed} failed, ~{freed / 1e6:.1f} MB of base64 "
+      f"{'would be ' if args.dry_run else ''}removed from MongoDB")
+
+# Keep the API's shared catalog snapshot in step with what was just written
+if moved and not args.dry_run and refresh_published() is not None:
+    print("📦 Catalog snapshot rebuilt")
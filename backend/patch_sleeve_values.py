@@ -5,7 +5,7 @@ Run this ONCE to fix sleeve values in your existing MongoDB data.
 This is much faster than re-running mobilenet_service.py (no image processing).
 
 Usage:
-    python patch_sleeve_values.py
+    python patch_sleeve_values.py [--dry-run]
 
 What it fixes:
   - t-shirt  → "short"      (was getting wrong value from default)
@@ -15,13 +15,19 @@ What it fixes:
   - dress/skirt/pants/shorts/hat/shoes → "sleeveless"
 """
 
+import argparse
 import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import certifi
+from app.utils.catalog_writer import CatalogWriter, distribution
 
 load_dotenv()
 
+parser = argparse.ArgumentParser(description="Fix sleeve values by category")
+parser.add_argument("--dry-run", action="store_true")
+args = parser.parse_args()
+
 MONGO_URI  = os.getenv("MONGO_URL")
 client     = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000, tlsCAFile=certifi.where())
 db         = client["ai_fashion"]
@@ -43,24 +49,16 @@ SLEEVE_MAP = {
 
 print("🔧 Patching sleeve values in MongoDB...\n")
 
-total_updated = 0
-
-for category, correct_sleeve in SLEEVE_MAP.items():
-    result = collection.update_many(
-        {"category": category},
-        {"$set": {"sleeves": correct_sleeve}}
-    )
-    if result.modified_count > 0:
-        print(f"   ✅ {category:12} → sleeves='{correct_sleeve}'  ({result.modified_count} docs updated)")
-    else:
-        print(f"   ⚪ {category:12} → no docs found (0 updated)")
-    total_updated += result.modified_count
+# One unordered bulk_write for every category instead of a round-trip each
+with CatalogWriter(collection, batch_size=len(SLEEVE_MAP), dry_run=args.dry_run,
+                   total=len(SLEEVE_MAP), label="categories") as writer:
+    for category, correct_sleeve in SLEEVE_MAP.items():
+        writer.update_many({"category": category}, {"$set": {"sleeves": correct_sleeve}})
+        print(f"   🔧 {category:12} → sleeves='{correct_sleeve}'")
 
-print(f"\n✅ Done! Total documents updated: {total_updated}")
+print(f"\n✅ Done! {writer.summary()}")
 
-# Verify
+# Verify (server-side aggregation, no documents pulled into Python)
 print("\n📊 Sleeve distribution after patch:")
-from collections import Counter
-all_docs = list(collection.find({}, {"_id": 0, "category": 1, "sleeves": 1}))
-for cat, sleeve in sorted(Counter((d["category"], d["sleeves"]) for d in all_docs).items()):
-    print(f"   {cat[0]:12} → {cat[1]}")
\ No newline at end of file
+for (cat, sleeve), count in distribution(collection, "category", "sleeves").items():
+    print(f"   {str(cat):12} → {sleeve}  ({count})")
\ No newline at end of file
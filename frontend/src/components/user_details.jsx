@@ -9,6 +9,7 @@ export default function UserDetails() {
   const navigate = useNavigate();
   const { user } = useUser();
   const [uploadedImages, setUploadedImages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [selectedImageId, setSelectedImageId] = useState(null);
   const [selectedDetails, setSelectedDetails] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -18,15 +19,19 @@ export default function UserDetails() {
     fetchUserImages();
   }, []);
 
-  const fetchUserImages = async () => {
-    setLoading(true);
+  // Pages are keyset-paginated; pass the previous next_cursor to append
+  const fetchUserImages = async (cursor = null) => {
+    setLoading(!cursor);
     try {
       const response = await axios.get(
-        `http://127.0.0.1:8000/user/images/default_user`
+        `http://127.0.0.1:8000/user/images/default_user`,
+        { params: cursor ? { cursor } : {} }
       );
 
       if (response.data.success) {
-        setUploadedImages(response.data.images || []);
+        const page = response.data.images || [];
+        setUploadedImages((prev) => (cursor ? [...prev, ...page] : page));
+        setNextCursor(response.data.next_cursor || null);
       }
     } catch (error) {
       console.error("Error fetching images:", error);
@@ -202,6 +207,14 @@ export default function UserDetails() {
                       </div>
                     </motion.div>
                   ))}
+                  {nextCursor && (
+                    <button
+                      onClick={() => fetchUserImages(nextCursor)}
+                      className="w-full py-2 text-sm font-semibold text-purple-600 hover:text-purple-800"
+                    >
+                      Load more
+                    </button>
+                  )}
                 </div>
               </div>
             </motion.div>
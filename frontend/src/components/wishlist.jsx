@@ -5,10 +5,10 @@ import { Trash2, Heart, ShoppingBag, ArrowLeft } from "lucide-react";
 import { useNavigate } from "react-router-dom";
 
 // ── Image component with fallback ─────────────────────────────────────────────
-function WishlistImage({ imageId }) {
+function WishlistImage({ src }) {
   const [error, setError] = useState(false);
 
-  if (!imageId || error) {
+  if (!src || error) {
     return (
       <div className="w-full h-full flex items-center justify-center text-6xl bg-gradient-to-br from-pink-200 via-rose-200 to-red-200">
         👗
@@ -18,7 +18,7 @@ function WishlistImage({ imageId }) {
 
   return (
     <img
-      src={`http://127.0.0.1:8000/user/image-file/${imageId}`}
+      src={src}
       alt="saved outfit"
       className="w-full h-full object-contain"
       onError={() => setError(true)}
@@ -29,6 +29,7 @@ function WishlistImage({ imageId }) {
 export default function WishlistPage() {
   const navigate = useNavigate();
   const [wishlistItems, setWishlistItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [filterOccasion, setFilterOccasion] = useState("");
@@ -40,8 +41,9 @@ export default function WishlistPage() {
     fetchWishlist();
   }, []);
 
-  const fetchWishlist = async () => {
-    setLoading(true);
+  // Pages are keyset-paginated; pass the previous next_cursor to append
+  const fetchWishlist = async (cursor = null) => {
+    setLoading(!cursor);
     setError(null);
     try {
       const response = await axios.get(
@@ -49,12 +51,15 @@ export default function WishlistPage() {
         {
           params: {
             user_id: "default_user",
+            ...(cursor ? { cursor } : {}),
           },
         }
       );
 
       if (response.data.success) {
-        setWishlistItems(response.data.items || []);
+        const page = response.data.items || [];
+        setWishlistItems((prev) => (cursor ? [...prev, ...page] : page));
+        setNextCursor(response.data.next_cursor || null);
       } else {
         setError(response.data.error || "Failed to fetch wishlist");
       }
@@ -256,7 +261,8 @@ export default function WishlistPage() {
               >
                 {/* Image */}
                 <div className="relative h-56 bg-gray-100 overflow-hidden flex items-center justify-center">
-                  <WishlistImage imageId={item.image_id} />
+                  {/* Thumbnail URL comes hydrated from /wishlist/get */}
+                  <WishlistImage src={item.image_url} />
 
                   {/* Heart Badge */}
                   <div className="absolute top-3 right-3 bg-white rounded-full w-10 h-10 flex items-center justify-center shadow-lg z-10">
@@ -320,6 +326,17 @@ export default function WishlistPage() {
           </motion.div>
         )}
 
+        {!loading && !error && nextCursor && (
+          <div className="text-center mt-8">
+            <button
+              onClick={() => fetchWishlist(nextCursor)}
+              className="px-6 py-3 bg-white text-rose-600 font-semibold rounded-xl shadow-md hover:shadow-lg transition-all"
+            >
+              Load more
+            </button>
+          </div>
+        )}
+
         {/* No Filtered Results */}
         {!loading && !error && wishlistItems.length > 0 && filteredItems.length === 0 && (
           <motion.div
@@ -206,13 +206,18 @@ export default function RecommendationsPage() {
   useEffect(() => {
     const fetchWishlist = async () => {
       try {
-        const res = await axios.get("http://127.0.0.1:8000/wishlist/get", {
-          params: { user_id: "default_user" },
-        });
-        if (res.data.success) {
-          const names = new Set((res.data.items || []).map((i) => i.outfit_name));
-          setWishlist(names);
-        }
+        // Only the saved names are needed here: walk every page at the max size
+        const names = new Set();
+        let cursor = null;
+        do {
+          const res = await axios.get("http://127.0.0.1:8000/wishlist/get", {
+            params: { user_id: "default_user", limit: 200, ...(cursor ? { cursor } : {}) },
+          });
+          if (!res.data.success) break;
+          (res.data.items || []).forEach((i) => names.add(i.outfit_name));
+          cursor = res.data.next_cursor;
+        } while (cursor);
+        setWishlist(names);
       } catch (err) {
         console.error("Could not fetch wishlist:", err);
       }